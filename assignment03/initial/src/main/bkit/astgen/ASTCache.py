@@ -0,0 +1,113 @@
+"""
+ Cache on disk of the ASTs built by ASTParser, so that an unchanged
+ source is neither lexed nor parsed again.
+"""
+import hashlib
+import os
+import tempfile
+from antlr4 import FileStream, InputStream
+import AST
+import ASTArena
+import ASTCodec
+import ASTParser
+import BKITLexer
+import BKITScanner
+
+
+def moduleVersion(*modules):
+    # Digest of the source of modules: a new grammar or ASTParser, or a
+    # new AST layout, gives new keys
+    digest = hashlib.sha256()
+    for module in modules:
+        with open(module.__file__, "rb") as file:
+            digest.update(file.read())
+    return digest.digest()
+
+
+VERSION = moduleVersion(AST, ASTArena, ASTCodec, ASTParser, BKITLexer, BKITScanner)
+
+
+class ASTCache:
+    """Content-addressed store of ASTs in a directory.
+
+    An AST is kept compressed in the ASTCodec encoding, in a file named by
+    the SHA-256 of VERSION and the source. The file is written under a
+    temporary name then renamed, so that processes sharing the directory
+    only ever read whole entries. Hits touch their file, and once the
+    entries take more than maxBytes the least recently used ones are
+    removed. A source with a syntax error raises ASTParser.ParseError.
+    """
+
+    def __init__(self, directory, maxBytes=256 * 2**20):
+        self.directory = directory
+        self.maxBytes = maxBytes
+        # Bytes taken by the entries, None until counted
+        self.size = None
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, source):
+        # source: bytes
+        return os.path.join(self.directory, hashlib.sha256(VERSION + source).hexdigest())
+
+    def load(self, source):
+        """AST of the source text, parsed only if it is not cached."""
+        return self.cached(source.encode(), lambda: InputStream(source))
+
+    def loadFile(self, filename):
+        """AST of a source file, read as FileStream does."""
+        with open(filename, "rb") as file:
+            source = file.read()
+        return self.cached(source, lambda: FileStream(filename))
+
+    def cached(self, source, input):
+        path = self.path(source)
+        asttree = self.get(path)
+        if asttree is None:
+            self.misses += 1
+            lexer = BKITScanner.BKITScanner(input())
+            asttree = ASTParser.ASTParser(lexer).program()
+            self.put(path, asttree)
+        else:
+            self.hits += 1
+        return asttree
+
+    def get(self, path):
+        try:
+            with open(path, "rb") as file:
+                asttree = ASTCodec.load(file)
+            os.utime(path)
+        except (OSError, EOFError, ASTCodec.ASTFormatError):
+            # Missing, or removed by another process meanwhile
+            return None
+        return asttree
+
+    def put(self, path, asttree):
+        data = ASTCodec.dumps(asttree, compress=True)
+        fd, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(temporary, path)
+        if self.size is not None:
+            self.size += len(data)
+        if self.size is None or self.size > self.maxBytes:
+            self.evict()
+
+    def evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        self.size = sum(size for _, size, _ in entries)
+        # Oldest first
+        entries.sort()
+        for _, size, path in entries:
+            if self.size <= self.maxBytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self.size -= size
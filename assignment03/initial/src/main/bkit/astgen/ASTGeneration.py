@@ -2,17 +2,25 @@ from main.bkit.utils.AST import *
 from BKITVisitor import BKITVisitor
 from BKITParser import BKITParser
 from AST import *
+from NameTable import NameTable
 # from AST_copy import *
-from functools import reduce
+from itertools import chain
 
 
 class ASTGeneration(BKITVisitor):
+    def __init__(self, names=None):
+        # Identifier names of the compilation, shared by all the Ids built
+        self.names = NameTable() if names is None else names
+
+    def identifier(self, node):
+        return Id(self.names.intern(node.getText()))
+
     def visitProgram(self, ctx: BKITParser.ProgramContext):
         # return Program([VarDecl(Id(ctx.ID().getText()), [], None)])
-        var_decl_lst = flatten([element.accept(self)
-                                for element in ctx.variable_declaration()])  # cần flatten lại cái thằng này
-        func_decl = [e.accept(self) for e in ctx.func_declaration()]
-        return Program(var_decl_lst + func_decl)
+        decl_lst = flatten(element.accept(self)
+                           for element in ctx.variable_declaration())  # cần flatten lại cái thằng này
+        decl_lst.extend(e.accept(self) for e in ctx.func_declaration())
+        return Program(decl_lst)
 
     def visitVariable_declaration(self, ctx: BKITParser.Variable_declarationContext):
         return ctx.variable_list().accept(self)
@@ -25,12 +33,12 @@ class ASTGeneration(BKITVisitor):
         varDimen_lst = [int(e.getText())
                         for e in ctx.INT()] if ctx.INT() else []
         varInit = ctx.exp().accept(self) if ctx.exp() else None
-        return VarDecl(Id(ctx.ID().getText()), varDimen_lst, varInit)
+        return VarDecl(self.identifier(ctx.ID()), varDimen_lst, varInit)
 
     def visitFunc_declaration(self, ctx):
         param = ctx.param_declaration().accept(self) if ctx.param_declaration() else []
         body = ctx.body().accept(self)
-        return FuncDecl(Id(ctx.ID().getText()), param, body)
+        return FuncDecl(self.identifier(ctx.ID()), param, body)
 
     def visitParam_declaration(self, ctx):
         return ctx.param_list().accept(self)
@@ -41,7 +49,7 @@ class ASTGeneration(BKITVisitor):
     def visitParam(self, ctx):
         varDimen_lst = [int(e.getText())
                         for e in ctx.INT()] if ctx.INT() else []
-        return VarDecl(Id(ctx.ID().getText()), varDimen_lst, None)
+        return VarDecl(self.identifier(ctx.ID()), varDimen_lst, None)
 
     def visitBody(self, ctx):
         mini_body = ctx.mini_body().accept(self)
@@ -51,8 +59,8 @@ class ASTGeneration(BKITVisitor):
         var_decl_lst = []
         stmt_lst = []
         if ctx.variable_declaration():
-            var_decl_lst = flatten([element.accept(self)
-                                    for element in ctx.variable_declaration()])
+            var_decl_lst = flatten(element.accept(self)
+                                   for element in ctx.variable_declaration())
         if ctx.stmt():
             stmt_lst = [element.accept(self) for element in ctx.stmt()]
         return [var_decl_lst, stmt_lst]
@@ -61,13 +69,13 @@ class ASTGeneration(BKITVisitor):
         return ctx.getChild(0).accept(self)
 
     def visitStatement_assign(self, ctx):
-        lhs = Id(ctx.ID().getText()) if ctx.ID(
+        lhs = self.identifier(ctx.ID()) if ctx.ID(
         ) else ctx.array_cell_decl().accept(self)
         rhs = ctx.exp().accept(self)
         return Assign(lhs, rhs)
 
     def visitArray_cell_decl(self, ctx):
-        arr = Id(ctx.ID().getText()) if ctx.ID(
+        arr = self.identifier(ctx.ID()) if ctx.ID(
         ) else ctx.function_call().accept(self)
         exp_lst = [e.accept(self) for e in ctx.exp()]
         return ArrayCell(arr, exp_lst)
@@ -98,7 +106,7 @@ class ASTGeneration(BKITVisitor):
     def visitStatement_for(self, ctx):
         mini_body = ctx.mini_body().accept(self)
         loop = (mini_body[0], mini_body[1])
-        return For(Id(ctx.ID().getText()), ctx.exp(0).accept(self), ctx.exp(1).accept(self), ctx.exp(2).accept(self), loop)
+        return For(self.identifier(ctx.ID()), ctx.exp(0).accept(self), ctx.exp(1).accept(self), ctx.exp(2).accept(self), loop)
 
     def visitStatement_while(self, ctx):
         expr = ctx.exp().accept(self)
@@ -128,41 +136,29 @@ class ASTGeneration(BKITVisitor):
         return Return(expr)
 
     def visitFunction_call(self, ctx):
-        method = Id(ctx.ID().getText())
+        method = self.identifier(ctx.ID())
         param = [e.accept(self) for e in ctx.exp()]
         return CallExpr(method, param)
 
+    def binaryChain(self, ctx):
+        # operand (op operand)*: the operators are left associative
+        left = ctx.getChild(0).accept(self)
+        for i in range(1, ctx.getChildCount(), 2):
+            op = ctx.getChild(i).getText()
+            left = BinaryOp(op, left, ctx.getChild(i + 1).accept(self))
+        return left
+
     def visitExp(self, ctx):
-        if ctx.getChildCount() == 1:
-            return ctx.exp1(0).accept(self)
-        op = ctx.getChild(1).getText()
-        left = ctx.exp1(0).accept(self)
-        right = ctx.exp1(1).accept(self)
-        return BinaryOp(op, left, right)
+        return self.binaryChain(ctx)
 
     def visitExp1(self, ctx):
-        if ctx.getChildCount() == 1:
-            return ctx.exp2().accept(self)
-        op = ctx.getChild(1).getText()
-        left = ctx.exp1().accept(self)
-        right = ctx.exp2().accept(self)
-        return BinaryOp(op, left, right)
+        return self.binaryChain(ctx)
 
     def visitExp2(self, ctx):
-        if ctx.getChildCount() == 1:
-            return ctx.exp3().accept(self)
-        op = ctx.getChild(1).getText()
-        left = ctx.exp2().accept(self)
-        right = ctx.exp3().accept(self)
-        return BinaryOp(op, left, right)
+        return self.binaryChain(ctx)
 
     def visitExp3(self, ctx):
-        if ctx.getChildCount() == 1:
-            return ctx.exp4().accept(self)
-        op = ctx.getChild(1).getText()
-        left = ctx.exp3().accept(self)
-        right = ctx.exp4().accept(self)
-        return BinaryOp(op, left, right)
+        return self.binaryChain(ctx)
 
     def visitExp4(self, ctx):
         if ctx.getChildCount() == 1:
@@ -179,11 +175,16 @@ class ASTGeneration(BKITVisitor):
         return UnaryOp(op, body)
 
     def visitOperand(self, ctx):
-        if ctx.getChildCount() == 3:
-            return ctx.exp().accept(self)
-        elif ctx.ID():
-            return Id(ctx.ID().getText())
-        return ctx.getChild(0).accept(self)
+        if ctx.literal():
+            return ctx.literal().accept(self)
+        elif ctx.LB_ROUND():
+            return ctx.exp(0).accept(self)
+        arr = self.identifier(ctx.ID()) if ctx.ID(
+        ) else ctx.function_call().accept(self)
+        if ctx.LB_SQUARE():
+            exp_lst = [e.accept(self) for e in ctx.exp()]
+            return ArrayCell(arr, exp_lst)
+        return arr
 
     def visitLiteral(self, ctx):
         if ctx.INT():
@@ -208,4 +209,6 @@ class ASTGeneration(BKITVisitor):
 
 
 def flatten(lst):
-    return list(reduce(lambda x, y: x+y, lst, []))
+    # Single pass over the sublists; concatenating them with + copied the
+    # result built so far for every sublist, which was quadratic
+    return list(chain.from_iterable(lst))
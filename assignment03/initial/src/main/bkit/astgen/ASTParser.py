@@ -0,0 +1,367 @@
+"""
+ Recursive-descent parser of BKIT building the AST in one pass, without
+ the parse tree of BKITParser that ASTGeneration walks again.
+"""
+from antlr4 import Token
+from BKITLexer import BKITLexer as T
+from AST import *
+from NameTable import NameTable
+
+# Tokens starting an expression and a statement
+EXP_START = frozenset([T.INT, T.FLOAT, T.BOOLEAN, T.STRING, T.ID, T.LB_CURLY, T.LB_ROUND,
+                       T.NOT, T.SUB_INT, T.SUB_FLOAT])
+STMT_START = frozenset([T.ID, T.IF, T.FOR, T.WHILE, T.DO, T.BREAK, T.CONTINUE, T.RETURN])
+
+# exp1 to exp3: precedence of the left associative binary operators
+PRECEDENCE = {
+    T.AND: 1, T.OR: 1,
+    T.ADD_INT: 2, T.ADD_FLOAT: 2, T.SUB_INT: 2, T.SUB_FLOAT: 2,
+    T.MUL_INT: 3, T.MUL_FLOAT: 3, T.DIV_INT: 3, T.DIV_FLOAT: 3, T.MOD_INT: 3,
+}
+COMPARE = (T.OP_COMPARE_INT, T.OP_COMPARE_FLOAT)
+
+# Tokens read ahead are dropped once this many are consumed
+DISCARD = 4096
+
+
+class ParseError(Exception):
+    def __init__(self, token):
+        self.token = token
+        self.message = "Error on line " + str(token.line) + " col " + str(token.column) + ": " + token.text
+
+
+class ASTParser:
+    """Parser of the program rule of BKIT.g4 giving the AST of ASTGeneration.
+
+    Tokens are read from lexer, a BKITLexer or BKITScanner, as they are
+    needed. The first syntax error raises ParseError, whose message is
+    the one of NewErrorListener for the same token; there is no
+    recovery. Identifiers are interned in names.
+    """
+
+    def __init__(self, lexer, names=None):
+        self.lexer = lexer
+        self.names = NameTable() if names is None else names
+        self.tokens = [lexer.nextToken()]
+        # Current token, tokens[p], and its type
+        self.p = 0
+        self.token = self.tokens[0]
+        self.type = self.token.type
+        # Whether consumed tokens must be kept to go back to
+        self.speculating = False
+        # Depth of the lookaheads of BKITParser predictions being parsed
+        self.predicting = 0
+
+    def LA(self, i):
+        # Type of the i-th token from the current one, the current one being 1
+        while self.p + i > len(self.tokens):
+            self.tokens.append(self.lexer.nextToken())
+        return self.tokens[self.p + i - 1].type
+
+    def consume(self):
+        token = self.token
+        if token.type != Token.EOF:
+            self.p += 1
+            if self.p == len(self.tokens):
+                if self.p >= DISCARD and not self.speculating:
+                    self.tokens.clear()
+                    self.p = 0
+                self.tokens.append(self.lexer.nextToken())
+            self.token = self.tokens[self.p]
+            self.type = self.token.type
+        return token
+
+    def match(self, type):
+        if self.type != type:
+            self.error()
+        return self.consume()
+
+    def error(self, noViableAlt=False):
+        # BKITParser reports a failed prediction, no viable alternative, once
+        # the whole input is lexed, and a mismatched token once it has looked
+        # at the next one: a lexer error there comes first
+        if not self.speculating:
+            if noViableAlt or self.predicting:
+                while self.tokens[-1].type != Token.EOF:
+                    self.tokens.append(self.lexer.nextToken())
+            else:
+                self.LA(2)
+        raise ParseError(self.token)
+
+    def unwanted(self):
+        # A token after an iteration of a loop that cannot end there is
+        # reported by BKITParser before looking at the next one
+        if self.predicting:
+            self.error()
+        raise ParseError(self.token)
+
+    def identifier(self):
+        return Id(self.names.intern(self.match(T.ID).text))
+
+    def program(self):
+        decl = []
+        while self.type == T.VAR:
+            decl.extend(self.variableDeclaration())
+        while self.type == T.FUNCTION:
+            decl.append(self.funcDeclaration())
+        if decl and self.type != Token.EOF:
+            self.unwanted()
+        self.match(Token.EOF)
+        return Program(decl)
+
+    def variableDeclaration(self):
+        self.match(T.VAR)
+        self.match(T.COLON)
+        decls = [self.variable(True)]
+        while self.type == T.CM:
+            self.consume()
+            decls.append(self.variable(True))
+        self.match(T.SM)
+        return decls
+
+    def variable(self, initial):
+        # variable, or param when not initial
+        name = self.identifier()
+        varDimen = []
+        while self.type == T.LB_SQUARE:
+            self.consume()
+            varDimen.append(int(self.match(T.INT).text))
+            self.match(T.RB_SQUARE)
+        varInit = None
+        if initial and self.type == T.ASSIGN:
+            self.consume()
+            varInit = self.exp()
+        return VarDecl(name, varDimen, varInit)
+
+    def funcDeclaration(self):
+        self.match(T.FUNCTION)
+        self.match(T.COLON)
+        name = self.identifier()
+        param = []
+        if self.type == T.PARAMETER:
+            self.consume()
+            self.match(T.COLON)
+            param.append(self.variable(False))
+            while self.type == T.CM:
+                self.consume()
+                param.append(self.variable(False))
+        self.match(T.BODY)
+        self.match(T.COLON)
+        body = self.miniBody()
+        self.match(T.ENDBODY)
+        self.match(T.DOT)
+        return FuncDecl(name, param, body)
+
+    def miniBody(self):
+        varDecls = []
+        while self.type == T.VAR:
+            varDecls.extend(self.variableDeclaration())
+        stmts = []
+        while self.type in STMT_START:
+            if self.type == T.WHILE and not self.whileDo():
+                break
+            stmts.append(self.statement())
+        return (varDecls, stmts)
+
+    def whileDo(self):
+        # Whether While starts a statement rather than ending the body of a
+        # Do. As BKITParser predicts, with the follow of every mini_body,
+        # it does if exp Do comes after it, whatever the enclosing rule
+        p, predicting = self.p, self.predicting
+        self.speculating = True
+        self.consume()
+        try:
+            self.exp()
+            statement = self.type == T.DO
+        except ParseError:
+            statement = False
+        self.speculating = False
+        self.predicting = predicting
+        self.p = p
+        self.token = self.tokens[p]
+        self.type = self.token.type
+        return statement
+
+    def statement(self):
+        type = self.type
+        if type == T.ID:
+            return self.assignOrCall()
+        elif type == T.IF:
+            return self.ifStatement()
+        elif type == T.FOR:
+            self.consume()
+            self.match(T.LB_ROUND)
+            idx1 = self.identifier()
+            self.match(T.ASSIGN)
+            expr1 = self.exp()
+            self.match(T.CM)
+            expr2 = self.exp()
+            self.match(T.CM)
+            expr3 = self.exp()
+            self.match(T.RB_ROUND)
+            self.match(T.DO)
+            loop = self.miniBody()
+            self.match(T.ENDFOR)
+            self.match(T.DOT)
+            return For(idx1, expr1, expr2, expr3, loop)
+        elif type == T.WHILE:
+            self.consume()
+            exp = self.exp()
+            self.match(T.DO)
+            sl = self.miniBody()
+            self.match(T.ENDWHILE)
+            self.match(T.DOT)
+            return While(exp, sl)
+        elif type == T.DO:
+            self.consume()
+            sl = self.miniBody()
+            self.match(T.WHILE)
+            exp = self.exp()
+            self.match(T.ENDDO)
+            self.match(T.DOT)
+            return Dowhile(sl, exp)
+        elif type == T.BREAK:
+            self.consume()
+            self.match(T.SM)
+            return Break()
+        elif type == T.CONTINUE:
+            self.consume()
+            self.match(T.SM)
+            return Continue()
+        else:
+            self.match(T.RETURN)
+            expr = self.exp() if self.type in EXP_START else None
+            self.match(T.SM)
+            return Return(expr)
+
+    def assignOrCall(self):
+        # (ID | array_cell_decl) ASSIGN exp SM, or function_call SM, told
+        # apart by the token after ID or after the call, so that the call is
+        # in the lookahead of BKITParser
+        if self.LA(2) == T.LB_ROUND:
+            self.predicting += 1
+            lhs = self.functionCall()
+            self.predicting -= 1
+            if self.type == T.SM:
+                self.consume()
+                return CallStmt(lhs.method, lhs.param)
+            if self.type != T.LB_SQUARE:
+                self.error(True)
+            lhs = self.arrayCell(lhs)
+        else:
+            lhs = self.identifier()
+            if self.type == T.LB_SQUARE:
+                lhs = self.arrayCell(lhs)
+            elif self.type != T.ASSIGN:
+                self.error(True)
+        self.match(T.ASSIGN)
+        rhs = self.exp()
+        self.match(T.SM)
+        return Assign(lhs, rhs)
+
+    def ifStatement(self):
+        self.match(T.IF)
+        ifthenStmt = []
+        while True:
+            expr = self.exp()
+            self.match(T.THEN)
+            varDecls, stmts = self.miniBody()
+            ifthenStmt.append((expr, varDecls, stmts))
+            if self.type != T.ELSEIF:
+                break
+            self.consume()
+        if len(ifthenStmt) > 1 and self.type not in (T.ELSE, T.ENDIF):
+            self.unwanted()
+        elseStmt = ([], [])
+        if self.type == T.ELSE:
+            self.consume()
+            elseStmt = self.miniBody()
+        self.match(T.ENDIF)
+        self.match(T.DOT)
+        return If(ifthenStmt, elseStmt)
+
+    def functionCall(self):
+        method = self.identifier()
+        self.match(T.LB_ROUND)
+        return CallExpr(method, self.expList(T.RB_ROUND))
+
+    def expList(self, end):
+        # (exp (CM exp)*)? end
+        exps = []
+        if self.type != end:
+            exps.append(self.exp())
+            while self.type == T.CM:
+                self.consume()
+                exps.append(self.exp())
+            if len(exps) > 1 and self.type != end:
+                self.unwanted()
+        self.match(end)
+        return exps
+
+    def arrayCell(self, arr):
+        idx = []
+        while self.type == T.LB_SQUARE:
+            self.consume()
+            idx.append(self.exp())
+            self.match(T.RB_SQUARE)
+        return ArrayCell(arr, idx)
+
+    def exp(self):
+        # exp1 with at most one comparison
+        left = self.binary(1)
+        if self.type in COMPARE:
+            op = self.consume().text
+            return BinaryOp(op, left, self.binary(1))
+        return left
+
+    def binary(self, precedence):
+        # Precedence climbing over exp1 to exp3
+        left = self.unary()
+        while PRECEDENCE.get(self.type, 0) >= precedence:
+            next = PRECEDENCE[self.type] + 1
+            op = self.consume().text
+            left = BinaryOp(op, left, self.binary(next))
+        return left
+
+    def unary(self):
+        # exp4: NOT exp4 | exp5; exp5: (SUB_FLOAT | SUB_INT) exp5 | operand
+        ops = []
+        while self.type == T.NOT:
+            ops.append(self.consume().text)
+        while self.type == T.SUB_INT or self.type == T.SUB_FLOAT:
+            ops.append(self.consume().text)
+        body = self.operand()
+        for op in reversed(ops):
+            body = UnaryOp(op, body)
+        return body
+
+    def operand(self):
+        type = self.type
+        if type == T.ID:
+            if self.LA(2) == T.LB_ROUND:
+                arr = self.functionCall()
+            else:
+                arr = self.identifier()
+            return self.arrayCell(arr) if self.type == T.LB_SQUARE else arr
+        elif type == T.INT:
+            _int = self.consume().text
+            if "o" in _int or "O" in _int:
+                return IntLiteral(int(_int, 8))
+            elif "x" in _int or "X" in _int:
+                return IntLiteral(int(_int, 16))
+            return IntLiteral(int(_int))
+        elif type == T.FLOAT:
+            return FloatLiteral(float(self.consume().text))
+        elif type == T.BOOLEAN:
+            return BooleanLiteral(self.consume().text == "True")
+        elif type == T.STRING:
+            return StringLiteral(self.consume().text)
+        elif type == T.LB_CURLY:
+            self.consume()
+            return ArrayLiteral(self.expList(T.RB_CURLY))
+        if type != T.LB_ROUND:
+            self.error()
+        self.consume()
+        exp = self.exp()
+        self.match(T.RB_ROUND)
+        return exp
@@ -0,0 +1,104 @@
+"""
+ Front end reading the top-level declarations of a BKIT source one at a
+ time: the tokens and parse tree of a declaration are dropped as soon as
+ its AST is built, so only one declaration is held at a time.
+"""
+from antlr4 import CommonTokenStream, Token
+from antlr4.error.ErrorListener import ErrorListener
+from BKITScanner import BKITScanner
+from BKITParser import BKITParser
+from AST import *
+from ASTGeneration import ASTGeneration
+from ASTParser import ParseError
+from NameTable import NameTable
+
+
+class ParseErrorListener(ErrorListener):
+    """Raises the ParseError of ASTParser at the first syntax error."""
+    INSTANCE = None
+
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        raise ParseError(offendingSymbol)
+ParseErrorListener.INSTANCE = ParseErrorListener()
+
+
+class DeclarationTokenStream(CommonTokenStream):
+    """CommonTokenStream able to forget the tokens already consumed."""
+
+    def discardConsumed(self):
+        del self.tokens[:self.index]
+        for i, token in enumerate(self.tokens):
+            token.tokenIndex = i
+        self.index = 0
+
+
+class DeclarationStream:
+    """Top-level declarations of a source, parsed when iterated over.
+
+    Iterating yields the VarDecl and FuncDecl ASTs of the program() rule
+    in source order, parsing the next declaration only when asked for it.
+    headers() is a quicker pass giving the same declarations with empty
+    function bodies: the body tokens are skipped instead of parsed.
+    Both passes read input from its start and intern identifiers in names.
+    The first syntax error a pass reads raises ParseError, with the message
+    ASTParser gives for it.
+    """
+
+    def __init__(self, input, names=None):
+        self.input = input
+        self.names = NameTable() if names is None else names
+
+    def __iter__(self):
+        return self.declarations(False)
+
+    def headers(self):
+        return list(self.declarations(True))
+
+    def declarations(self, headersOnly):
+        self.input.seek(0)
+        lexer = BKITScanner(self.input)
+        lexer.names = self.names
+        tokens = DeclarationTokenStream(lexer)
+        parser = BKITParser(tokens)
+        parser.removeErrorListeners()
+        parser.addErrorListener(ParseErrorListener.INSTANCE)
+        generation = ASTGeneration(self.names)
+        # program: variable_declaration* func_declaration* EOF
+        functions = False
+        while True:
+            la = tokens.LA(1)
+            if la == BKITParser.VAR and not functions:
+                yield from generation.visit(parser.variable_declaration())
+            elif la == BKITParser.FUNCTION:
+                functions = True
+                if headersOnly:
+                    yield self.header(parser, tokens, generation)
+                else:
+                    yield generation.visit(parser.func_declaration())
+            else:
+                if la != Token.EOF:
+                    parser.notifyErrorListeners("mismatched input %s expecting %s" % (
+                        parser._errHandler.getTokenErrorDisplay(tokens.LT(1)),
+                        "{<EOF>, 'Function'}" if functions else "{<EOF>, 'Var', 'Function'}"))
+                return
+            tokens.discardConsumed()
+            parser._errHandler.reset(parser)
+
+    def header(self, parser, tokens, generation):
+        # FUNCTION COLON ID param_declaration? with the body skipped up to
+        # its ENDBODY DOT, as there are no nested functions
+        tokens.consume()
+        if tokens.LA(1) == BKITParser.COLON:
+            tokens.consume()
+        name = Id(self.names.intern(tokens.LT(1).text))
+        if tokens.LA(1) == BKITParser.ID:
+            tokens.consume()
+        param = []
+        if tokens.LA(1) == BKITParser.PARAMETER:
+            param = generation.visit(parser.param_declaration())
+        while tokens.LA(1) not in (BKITParser.ENDBODY, Token.EOF):
+            tokens.consume()
+        for end in (BKITParser.ENDBODY, BKITParser.DOT):
+            if tokens.LA(1) == end:
+                tokens.consume()
+        return FuncDecl(name, param, ([], []))
@@ -0,0 +1,112 @@
+"""
+ Checking every BKIT source of a directory in a pool of processes.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import os
+import time
+import traceback
+from antlr4 import InputStream
+from ASTCache import ASTCache
+from ASTParser import ParseError
+from DeclarationStream import DeclarationStream
+from MappedInputStream import MappedInputStream
+from StaticCheck import StaticChecker
+from StreamingCheck import StreamingChecker
+from StaticError import StaticError
+
+# Program going through every parser rule, checked once per worker
+WARM_UP = """Var: x = 0x1F, s = "a\\n", f = 1.5e2, b = True, a[2][3] = {{1,2,3},{4,5,6}};
+Function: foo
+Parameter: n, m[2]
+Body:
+    Var: i;
+    For (i = 0, i < n, 1) Do
+        If (i % 2 == 0) && !b Then x = x + m[i \\ 2] * 3 - 1;
+        ElseIf i >= 10 Then Break;
+        Else Continue;
+        EndIf.
+    EndFor.
+    While f >. 1.0 Do f = f *. 0.5 -. float_of_int(-x); EndWhile.
+    Do printStrLn(s); While b || (x != 1) EndDo.
+    Return n;
+EndBody.
+Function: main
+Body:
+    a[0][1] = foo(1, {1, 2});
+    printLn();
+    Return;
+EndBody."""
+
+
+# ASTCache of the worker process, if any
+cache = None
+
+
+def warmUp(cacheDir=None):
+    # Initializer of the worker processes. The DFA caches of the lexer and
+    # parser are shared by all their instances in a process: filling them
+    # here keeps the first files of a worker from paying for it
+    global cache
+    cache = None if cacheDir is None else ASTCache(cacheDir)
+    StreamingChecker(DeclarationStream(InputStream(WARM_UP))).check()
+
+
+def checkFile(inputfile, outputfile):
+    # Runs in a worker process. Writes the first error of the source, like
+    # TestChecker.test1, and returns (status, milliseconds)
+    start = time.perf_counter()
+    status = "ok"
+    text = ""
+    try:
+        if cache is not None:
+            StaticChecker(cache.loadFile(inputfile)).check()
+        else:
+            stream = MappedInputStream(inputfile)
+            try:
+                StreamingChecker(DeclarationStream(stream)).check()
+            finally:
+                stream.close()
+    except StaticError as e:
+        status = "error"
+        text = str(e) + "\n"
+    except ParseError as e:
+        # ASTParser, with the cache, and DeclarationStream both raise it at
+        # the first syntax error
+        status = "failed"
+        text = e.message
+    except Exception as e:
+        status = "failed"
+        text = getattr(e, "message", None) or traceback.format_exc()
+    elapsed = (time.perf_counter() - start) * 1000
+    with open(outputfile, "w") as dest:
+        dest.write(text)
+    return status, elapsed
+
+
+def checkDirectory(inputdir, outputdir, maxWorkers=None, cacheDir=None):
+    """Check every file of inputdir in its own task of a process pool.
+
+    outputdir receives a file of the same name with the result of each
+    source and timing.csv, the status and checking time of every file.
+    With a cacheDir the ASTs are taken from an ASTCache in it instead of
+    being streamed. Returns the list of (name, status, milliseconds) in
+    name order.
+    """
+    names = sorted(_name for _name in os.listdir(inputdir)
+                   if os.path.isfile(os.path.join(inputdir, _name)))
+    os.makedirs(outputdir, exist_ok=True)
+    if not names:
+        return []
+    workers = min(maxWorkers or os.cpu_count() or 1, len(names))
+    # Files are sent in batches to save round trips
+    chunksize = max(1, len(names) // (4 * workers))
+    with ProcessPoolExecutor(workers, initializer=warmUp, initargs=(cacheDir,)) as pool:
+        results = list(pool.map(checkFile,
+                                [os.path.join(inputdir, _name) for _name in names],
+                                [os.path.join(outputdir, _name) for _name in names],
+                                chunksize=chunksize))
+    with open(os.path.join(outputdir, "timing.csv"), "w") as timing:
+        timing.write("file,status,ms\n")
+        for _name, (status, elapsed) in zip(names, results):
+            timing.write("%s,%s,%.1f\n" % (_name, status, elapsed))
+    return [(_name, status, elapsed) for _name, (status, elapsed) in zip(names, results)]
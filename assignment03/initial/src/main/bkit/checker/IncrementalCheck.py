@@ -0,0 +1,227 @@
+"""
+ Incremental static checking: results are cached per group of declarations
+ that refer to each other, so an edit only re-checks the affected group.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+from AST import *
+from Visitor import *
+from StaticError import *
+from StaticCheck import StaticChecker
+
+
+def declName(decl):
+    return decl.variable.name if isinstance(decl, VarDecl) else decl.name.name
+
+
+class NameCollector(BaseVisitor):
+    """Adds to param (a set) every name used inside a declaration,
+    whether it is a variable or a called function.
+    """
+
+    # Nodes yield their children, see Visitor.visit
+
+    def visitList(self, lst, c):
+        for e in lst:
+            yield e, c
+
+    def visitVarDecl(self, ast, c):
+        if ast.varInit is not None:
+            yield ast.varInit, c
+
+    def visitFuncDecl(self, ast, c):
+        yield from self.visitList(ast.body[0], c)
+        yield from self.visitList(ast.body[1], c)
+
+    def visitId(self, ast, c):
+        c.add(ast.name)
+
+    def visitArrayCell(self, ast, c):
+        yield ast.arr, c
+        for e in ast.idx:
+            yield e, c
+
+    def visitBinaryOp(self, ast, c):
+        yield ast.left, c
+        yield ast.right, c
+
+    def visitUnaryOp(self, ast, c):
+        yield ast.body, c
+
+    def visitCallExpr(self, ast, c):
+        c.add(ast.method.name)
+        for e in ast.param:
+            yield e, c
+
+    def visitArrayLiteral(self, ast, c):
+        for e in ast.value:
+            yield e, c
+
+    def visitAssign(self, ast, c):
+        yield ast.lhs, c
+        yield ast.rhs, c
+
+    def visitIf(self, ast, c):
+        for exp, varDecls, stmts in ast.ifthenStmt:
+            yield exp, c
+            yield from self.visitList(varDecls, c)
+            yield from self.visitList(stmts, c)
+        yield from self.visitList(ast.elseStmt[0], c)
+        yield from self.visitList(ast.elseStmt[1], c)
+
+    def visitFor(self, ast, c):
+        yield from self.visitList([ast.idx1, ast.expr1, ast.expr2, ast.expr3], c)
+        yield from self.visitList(ast.loop[0], c)
+        yield from self.visitList(ast.loop[1], c)
+
+    def visitReturn(self, ast, c):
+        if ast.expr is not None:
+            yield ast.expr, c
+
+    def visitDowhile(self, ast, c):
+        yield from self.visitList(ast.sl[0], c)
+        yield from self.visitList(ast.sl[1], c)
+        yield ast.exp, c
+
+    def visitWhile(self, ast, c):
+        yield ast.exp, c
+        yield from self.visitList(ast.sl[0], c)
+        yield from self.visitList(ast.sl[1], c)
+
+    def visitCallStmt(self, ast, c):
+        return self.visitCallExpr(ast, c)
+
+
+@dataclass
+class ComponentResult:
+    # first error and the name of the declaration it was raised in
+    error: StaticError = None
+    errorDecl: str = None
+    # first statement whose type is still unknown at the end of the component
+    unresolved: Tuple[str, Stmt] = None
+    # inferred type of every global variable and function of the component
+    signatures: Dict[str, object] = field(default_factory=dict)
+
+
+class IncrementalChecker:
+    """Checks a Program like StaticChecker, caching what can be reused.
+
+    Types only flow between declarations through names, so declarations
+    are grouped into components: two declarations belong to the same
+    component when one refers to the other, directly or through other
+    declarations. A component is checked on its own by a StaticChecker
+    that only declares its members. Its result is cached until update()
+    replaces one of its declarations. The error reported is the one the
+    sequential checker would report first.
+    """
+
+    def __init__(self, ast):
+        self.ast = Program(list(ast.decl))
+        # declaration name -> global names it refers to
+        self.references = {}
+        # frozenset of declaration names -> ComponentResult
+        self.results = {}
+
+    def update(self, decl):
+        """Replace the declaration with the same name, or add a new one."""
+        _name = declName(decl)
+        for i, e in enumerate(self.ast.decl):
+            if declName(e) == _name:
+                self.ast.decl[i] = decl
+                break
+        else:
+            self.ast.decl.append(decl)
+        self.references.pop(_name, None)
+        self.results = {key: result for key, result in self.results.items()
+                        if _name not in key}
+
+    def getReferences(self, decl, globalNames):
+        _name = declName(decl)
+        if _name not in self.references:
+            names = set()
+            NameCollector().visit(decl, names)
+            names.discard(_name)
+            self.references[_name] = names
+        return self.references[_name] & globalNames
+
+    def components(self):
+        decls = self.ast.decl
+        parent = {declName(e): declName(e) for e in decls}
+
+        def find(_name):
+            while parent[_name] != _name:
+                parent[_name] = parent[parent[_name]]
+                _name = parent[_name]
+            return _name
+
+        globalNames = parent.keys()
+        for e in decls:
+            for ref in self.getReferences(e, globalNames):
+                parent[find(ref)] = find(declName(e))
+
+        groups = {}
+        for e in decls:
+            groups.setdefault(find(declName(e)), []).append(e)
+        return list(groups.values())
+
+    def checkComponent(self, decls):
+        checker = StaticChecker(Program(decls))
+        c = checker.global_envi
+        checker.declareGlobals(decls, c)
+        result = ComponentResult()
+        # where the unresolved statements of each declaration start
+        starts = []
+        for decl in decls:
+            starts.append((len(checker.unresolved), declName(decl)))
+            try:
+                checker.visit(decl, c)
+            except StaticError as e:
+                result.error, result.errorDecl = e, declName(decl)
+                break
+        if result.error is None:
+            for i, (_stmt, _type) in enumerate(checker.unresolved):
+                if not checker.unifier.isResolved(_type):
+                    _decl = [_name for start, _name in starts if start <= i][-1]
+                    result.unresolved = (_decl, _stmt)
+                    break
+        for decl in decls:
+            _symbol = c.lookup(declName(decl))
+            result.signatures[_symbol.name] = checker.unifier.resolve(_symbol.mtype)
+        return result
+
+    def checkComponents(self, components):
+        """ComponentResult of each component, in the same order."""
+        return [self.checkComponent(component) for component in components]
+
+    def check(self):
+        decls = self.ast.decl
+        # Redeclared and NoEntryPoint concern the whole program
+        checker = StaticChecker(self.ast)
+        checker.declareGlobals(decls, checker.global_envi)
+        checker.checkEntryPoint(checker.global_envi)
+
+        results = {}
+        pending = {}
+        for component in self.components():
+            key = frozenset(declName(e) for e in component)
+            results[key] = self.results.get(key)
+            if results[key] is None:
+                pending[key] = component
+        for key, result in zip(pending, self.checkComponents(list(pending.values()))):
+            results[key] = result
+        self.results = results
+
+        position = {declName(e): i for i, e in enumerate(decls)}
+        errors = [r for r in results.values() if r.error is not None]
+        if errors:
+            raise min(errors, key=lambda r: position[r.errorDecl]).error
+        unresolved = [r.unresolved for r in results.values() if r.unresolved is not None]
+        if unresolved:
+            raise TypeCannotBeInferred(min(unresolved, key=lambda u: position[u[0]])[1])
+
+    def signature(self, _name):
+        """Inferred type of a global variable or function after check()."""
+        for key, result in self.results.items():
+            if _name in key:
+                return result.signatures.get(_name)
+        return None
@@ -0,0 +1,36 @@
+"""
+ Static checking of independent components in a pool of processes.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import os
+from AST import *
+from IncrementalCheck import IncrementalChecker
+
+
+def checkComponent(decls):
+    # Runs in a worker process: decls and the result are pickled
+    return IncrementalChecker(Program(decls)).checkComponent(decls)
+
+
+class ParallelChecker(IncrementalChecker):
+    """Checks a Program like StaticChecker, one component per task.
+
+    The components of IncrementalChecker share no name, so no inferred type
+    flows between them and they can be checked in any order. The results
+    are merged by the position of their declarations in the program, which
+    gives the error and signatures of the sequential checker whatever order
+    the workers finish in.
+    """
+
+    def __init__(self, ast, maxWorkers=None):
+        super().__init__(ast)
+        self.maxWorkers = maxWorkers
+
+    def checkComponents(self, components):
+        if len(components) < 2:
+            return super().checkComponents(components)
+        workers = min(self.maxWorkers or os.cpu_count() or 1, len(components))
+        # Small components are sent in batches to save round trips
+        chunksize = max(1, len(components) // (4 * workers))
+        with ProcessPoolExecutor(workers) as pool:
+            return list(pool.map(checkComponent, components, chunksize=chunksize))
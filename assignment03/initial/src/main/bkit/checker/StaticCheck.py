@@ -8,16 +8,41 @@ from typing import List, Tuple
 from AST import *
 from Visitor import *
 from StaticError import *
+from NameTable import NameTable
 from functools import *
+from types import MappingProxyType
+import weakref
 
 
-class Type(ABC):
-    __metaclass__ = ABCMeta
-    pass
+class InternedType(ABCMeta):
+    """Metaclass of the checker types.
+    Calling a type class with equal arguments returns the very same object:
+    primitive types are singletons, ArrayType and MType are hash-consed on
+    their components. Types are therefore immutable and compared with `is`.
+    """
+    _interned = weakref.WeakValueDictionary()
+
+    def __call__(cls, *args):
+        key = (cls,) + tuple(tuple(arg) if isinstance(arg, list) else arg
+                             for arg in args)
+        _type = InternedType._interned.get(key)
+        if _type is None:
+            _type = super().__call__(*key[1:])
+            InternedType._interned[key] = _type
+        return _type
+
+
+def reduceInterned(self):
+    # Unpickling goes through the metaclass, so the copy is interned as well
+    return type(self), tuple(getattr(self, _name)
+                             for _name in getattr(self, "__dataclass_fields__", ()))
+
+
+class Type(ABC, metaclass=InternedType):
+    __reduce__ = reduceInterned
 
 
 class Prim(Type):
-    __metaclass__ = ABCMeta
     pass
 
 
@@ -41,21 +66,123 @@ class VoidType(Type):
     pass
 
 
-class Unknown(Type):
+class ErrorType(Type):
+    """Type of an expression already reported as wrong.
+    It unifies with every type so that an error is only reported once,
+    not again by every construct that uses the wrong expression.
+    """
     pass
 
 
-@dataclass
+@dataclass(frozen=True, eq=False)
 class ArrayType(Type):
-    dimen: List[int]
+    dimen: Tuple[int, ...]
     eletype: Type
 
 
-@dataclass
-class MType:
-    intype: List[Type]
+@dataclass(frozen=True, eq=False)
+class MType(metaclass=InternedType):
+    intype: Tuple[Type, ...]
     restype: Type
 
+    __reduce__ = reduceInterned
+
+
+class TypeVariable:
+    """A type that is not inferred yet.
+    Type variables form a union-find forest: the root of a tree stands for
+    every variable unified with it and holds the type they are bound to.
+    Unlike the other types they are not interned, each one is fresh.
+    """
+
+    def __init__(self):
+        self.parent = self
+        self.rank = 0
+        self.type = None
+
+
+class Unifier:
+    """Solves the equalities between types found by the checker.
+    find() uses path compression and bind() union by rank, so a sequence of
+    unifications runs in near-linear time in the number of type variables.
+    """
+
+    def find(self, _type):
+        if not isinstance(_type, TypeVariable):
+            return _type
+        root = _type
+        while root.parent is not root:
+            root = root.parent
+        while _type.parent is not root:
+            _type.parent, _type = root, _type.parent
+        return root if root.type is None else root.type
+
+    def unify(self, lhs, rhs):
+        lhs = self.find(lhs)
+        rhs = self.find(rhs)
+        if lhs is rhs:
+            return True
+        if isinstance(lhs, TypeVariable):
+            return self.bind(lhs, rhs)
+        if isinstance(rhs, TypeVariable):
+            return self.bind(rhs, lhs)
+        if isinstance(lhs, ErrorType) or isinstance(rhs, ErrorType):
+            return True
+        if isinstance(lhs, ArrayType) and isinstance(rhs, ArrayType):
+            return lhs.dimen == rhs.dimen and self.unify(lhs.eletype, rhs.eletype)
+        return False
+
+    def bind(self, var, _type):
+        if isinstance(_type, TypeVariable):
+            if var.rank < _type.rank:
+                var, _type = _type, var
+            _type.parent = var
+            if var.rank == _type.rank:
+                var.rank += 1
+            return True
+        if isinstance(_type, ArrayType) and self.find(_type.eletype) is var:
+            return False
+        var.type = _type
+        return True
+
+    def resolve(self, _type):
+        _type = self.find(_type)
+        if isinstance(_type, ArrayType):
+            return ArrayType(_type.dimen, self.find(_type.eletype))
+        if isinstance(_type, MType):
+            return MType([self.resolve(t) for t in _type.intype], self.resolve(_type.restype))
+        return _type
+
+    def isResolved(self, _type):
+        _type = self.resolve(_type)
+        if isinstance(_type, ArrayType):
+            _type = _type.eletype
+        return not isinstance(_type, TypeVariable)
+
+
+# Short names for the primitive types
+INT = IntType()
+FLOAT = FloatType()
+STRING = StringType()
+BOOL = BoolType()
+VOID = VoidType()
+ERROR = ErrorType()
+
+# op -> (type of the operands, type of the result)
+BINARY_OP_TYPES = MappingProxyType({
+    **{op: (INT, INT) for op in ['+', '-', '*', '\\', '%']},
+    **{op: (FLOAT, FLOAT) for op in ['+.', '-.', '*.', '\\.']},
+    **{op: (BOOL, BOOL) for op in ['&&', '||']},
+    **{op: (INT, BOOL) for op in ['==', '!=', '<', '>', '<=', '>=']},
+    **{op: (FLOAT, BOOL) for op in ['=/=', '<.', '>.', '<=.', '>=.']},
+})
+
+UNARY_OP_TYPES = MappingProxyType({
+    '-': (INT, INT),
+    '-.': (FLOAT, FLOAT),
+    '!': (BOOL, BOOL),
+})
+
 
 @dataclass
 class Symbol:
@@ -64,365 +191,369 @@ class Symbol:
     kind: Kind
 
 
+class SymbolTable:
+    """Environment of the checker as a shadowing scope stack.
+    Every name maps to the stack of symbols currently declared with it, the
+    innermost one on top, and every open scope remembers the names it declared.
+    Entering a block is O(1), leaving it costs the number of names it declared
+    and a lookup is a single dict access whatever the nesting depth.
+    Declared names are interned in a NameTable, so looking up the Id of an
+    AST built with the same table compares the names by identity.
+    """
+
+    def __init__(self, names=None):
+        self.names = NameTable() if names is None else names
+        self.symbols = {}
+        self.scopes = [{}]
+
+    def enterScope(self):
+        self.scopes.append({})
+
+    def exitScope(self):
+        for _name in self.scopes.pop():
+            shadowed = self.symbols[_name]
+            shadowed.pop()
+            if not shadowed:
+                del self.symbols[_name]
+
+    def lookupLocal(self, _name):
+        return self.scopes[-1].get(_name)
+
+    def lookup(self, _name):
+        shadowed = self.symbols.get(_name)
+        return shadowed[-1] if shadowed else None
+
+    def declare(self, symbol):
+        symbol.name = self.names.intern(symbol.name)
+        scope = self.scopes[-1]
+        if symbol.name in scope:
+            raise Redeclared(symbol.kind, symbol.name)
+        scope[symbol.name] = symbol
+        self.symbols.setdefault(symbol.name, []).append(symbol)
+        return symbol
+
+
+class ErrorLimitReached(Exception):
+    """Stops checkAll() once it has collected as many errors as asked."""
+    pass
+
+
 class StaticChecker(BaseVisitor):
-    def __init__(self, ast):
+    def __init__(self, ast, names=None):
         self.ast = ast
-        self.global_envi = [
+        # names: the NameTable the AST was built with, if any
+        self.global_envi = SymbolTable(names)
+        self.unifier = Unifier()
+        # Function whose body is being checked and statement being checked
+        self.function = None
+        self.stmt = None
+        # (statement, type) pairs that must be resolved once the program is checked
+        self.unresolved = []
+        # Errors found so far when collecting them with checkAll()
+        self.errors = None
+        self.maxErrors = None
+        for symbol in [
             Symbol("int_of_float", MType(
-                [FloatType()], IntType()), Function()),
+                [FLOAT], INT), Function()),
             Symbol("float_of_int", MType(
-                [IntType()], FloatType()), Function()),
+                [INT], FLOAT), Function()),
             Symbol("int_of_string", MType(
-                [StringType()], IntType()), Function()),
+                [STRING], INT), Function()),
             Symbol("string_of_int", MType(
-                [IntType()], StringType()), Function()),
+                [INT], STRING), Function()),
             Symbol("float_of_string", MType(
-                [StringType()], FloatType()), Function()),
+                [STRING], FLOAT), Function()),
             Symbol("string_of_float", MType(
-                [FloatType()], StringType()), Function()),
+                [FLOAT], STRING), Function()),
             Symbol("bool_of_string", MType(
-                [StringType()], BoolType()), Function()),
+                [STRING], BOOL), Function()),
             Symbol("string_of_bool", MType(
-                [BoolType()], StringType()), Function()),
-            Symbol("read", MType([], StringType()), Function()),
-            Symbol("printLn", MType([], VoidType()), Function()),
-            Symbol("printStr", MType([StringType()], VoidType()), Function()),
-            Symbol("printStrLn", MType([StringType()], VoidType()), Function())]
-
-    @staticmethod
-    def getDictionary():
-        typeDict = {}
-        typeDict = {op: {'inType': IntType(), 'outType': IntType()}
-                    for op in ['+', '-', '*', '-']}
-        typeDict.update({op: {'inType': FloatType(), 'outType': FloatType()}
-                         for op in ['+.', '-.', '*.', '/.']})
-        typeDict.update({op: {'inType': BoolType(), 'outType': BoolType()}
-                         for op in ['&&', '||', '!']})
-        typeDict.update({op: {'inType': IntType(), 'outType': BoolType()}
-                         for op in ['>', '<', '>=', '<=', '==', '!=']})
-        typeDict.update({op: {'inType': FloatType(), 'outType': BoolType()}
-                         for op in ['>.', '<.', '>=.', '<=.', '=/=']})
-        return typeDict
+                [BOOL], STRING), Function()),
+            Symbol("read", MType([], STRING), Function()),
+            Symbol("printLn", MType([], VOID), Function()),
+            Symbol("printStr", MType([STRING], VOID), Function()),
+            Symbol("printStrLn", MType([STRING], VOID), Function())]:
+            self.global_envi.declare(symbol)
 
     def getSymbol(self, _name, scope):
-        for e in scope:
-            if e.name == _name:
-                return e
-        return
-
-    def getSymbolIndex(self, _name, scope):
-        for i in range(len(scope)):
-            if scope[i].name == _name:
-                return i
-
-    def checkRedeclared(self, symbol, scope):
-        for e in scope:
-            if e.name == symbol.name:
-                raise Redeclared(symbol.kind, symbol.name)
-
-    def checkUndeclared(self, _name, scope, _kind=Identifier()):
-        for e in scope:
-            if e.name == _name:
-                return
-        raise Undeclared(_kind, _name)
+        return scope.lookup(_name)
+
+    def getFunction(self, _name, scope):
+        _symbol = scope.lookup(_name)
+        if _symbol is None or not isinstance(_symbol.kind, Function):
+            self.report(Undeclared(Function(), _name))
+            return None
+        return _symbol
 
     def checkEntryPoint(self, globalScope):
-        for e in globalScope:
-            if isinstance(e.kind, Function) and e.name == "main":
-                return
-        raise NoEntryPoint()
+        _main = globalScope.lookupLocal("main")
+        if _main is None or not isinstance(_main.kind, Function):
+            self.report(NoEntryPoint())
+
+    def checkInferred(self):
+        reported = set()
+        for _stmt, _type in self.unresolved:
+            if id(_stmt) not in reported and not self.unifier.isResolved(_type):
+                reported.add(id(_stmt))
+                self.report(TypeCannotBeInferred(_stmt))
 
     def check(self):
         return self.visit(self.ast, self.global_envi)
 
-    def isNameInScope(self, _name, list):
-        for e in list:
-            if _name == e.name:
-                return True
-        return False
-
-    def directInfer(self, e, _type, scope):
-        if isinstance(e, Id):
-            self.getSymbol(e.name, scope).mtype = _type
-        elif isinstance(e, CallExpr):
-            self.getSymbol(e.method.name, scope).mtype = _type
-        elif isinstance(e, ArrayCell):
+    def checkAll(self, maxErrors=None):
+        """Check the program without stopping at the first error.
+        Returns the list of errors in the order check() would meet them,
+        at most maxErrors of them. After an error the checker goes on with
+        the rest of the construct: a wrong expression gets the type ERROR
+        and an undeclared variable is declared with it, so the constructs
+        depending on them are not reported again.
+        """
+        self.errors = []
+        self.maxErrors = maxErrors
+        try:
+            self.check()
+        except ErrorLimitReached:
             pass
-
-    def updateSymbolType(self, _name, scope, _type):
-        for e in scope:
-            if _name == e.name:
-                if isinstance(e.mtype, Type):
-                    e.mtype = _type
-                else:
-                    e.mtype.restype = _type
-                return True
-        return False
+        return self.errors
+
+    def report(self, error):
+        if self.errors is None:
+            raise error
+        self.errors.append(error)
+        if len(self.errors) == self.maxErrors:
+            raise ErrorLimitReached()
+
+    def declare(self, scope, symbol):
+        # The symbol is not declared again if the name is already taken
+        try:
+            return scope.declare(symbol)
+        except Redeclared as e:
+            self.report(e)
+            return None
+
+    def unify(self, lhs, rhs):
+        return self.unifier.unify(lhs, rhs)
+
+    def require(self, _type):
+        # The type has to be known by the end of the program
+        if not self.unifier.isResolved(_type):
+            self.unresolved.append((self.stmt, _type))
+
+    def paramType(self, param):
+        if len(param.varDimen) != 0:
+            return ArrayType(param.varDimen, TypeVariable())
+        return TypeVariable()
+
+    def declareVariables(self, varDecls, scope):
+        # Declare then visit one by one so that errors keep the source order
+        for varDecl in varDecls:
+            if self.declare(scope, Symbol(varDecl.variable.name, None, Variable())):
+                yield varDecl, scope
+
+    # Declarations and statements are yielded like the operands of
+    # expressions, see Visitor.visit, so nested blocks do not use the
+    # Python stack
+    def visitStatements(self, stmts, c):
+        outer = self.stmt
+        for _stmt in stmts:
+            self.stmt = _stmt
+            yield _stmt, c
+        self.stmt = outer
+
+    def visitBlock(self, block, c):
+        c.enterScope()
+        try:
+            yield from self.declareVariables(block[0], c)
+            yield from self.visitStatements(block[1], c)
+        finally:
+            c.exitScope()
+
+    def visitCall(self, ast, c, mismatch):
+        _function = self.getFunction(ast.method.name, c)
+        if _function is not None and len(ast.param) != len(_function.mtype.intype):
+            self.report(mismatch)
+            _function = None
+        argsTypeList = []
+        for _param in ast.param:
+            argsTypeList.append((yield _param, c))
+        if _function is None:
+            return ERROR
+        if not all([self.unify(_argType, _paramType)
+                    for _argType, _paramType in zip(argsTypeList, _function.mtype.intype)]):
+            self.report(TypeMismatchInExpression(ast))
+            return ERROR
+        for _argType in argsTypeList:
+            self.require(_argType)
+        return self.unifier.find(_function.mtype.restype)
 
     # name: str
     def visitId(self, ast, c):
-        self.checkUndeclared(ast.name, c, Variable())
         _symbol = self.getSymbol(ast.name, c)
+        if _symbol is None:
+            self.report(Undeclared(Variable(), ast.name))
+            return c.declare(Symbol(ast.name, ERROR, Variable())).mtype
+        if isinstance(_symbol.kind, Function):
+            self.report(Undeclared(Variable(), ast.name))
+            return ERROR
         return _symbol.mtype
 
+    def declareGlobals(self, decls, c):
+        # Returns the declarations that could be declared
+        declared = []
+        for e in decls:
+            if isinstance(e, VarDecl):
+                _symbol = self.declare(c, Symbol(e.variable.name, None, Variable()))
+            else:
+                _paramList = [self.paramType(param) for param in e.param]
+                _symbol = self.declare(c, Symbol(e.name.name, MType(
+                    _paramList, TypeVariable()), Function()))
+            if _symbol is not None:
+                declared.append(e)
+        return declared
+
     # decl:List[Decl]
     def visitProgram(self, ast, c):
         # Need to check entry point before visiting the children
-        for e in ast.decl:
-            if isinstance(e, VarDecl):
-                _var = Symbol(e.variable.name, Unknown(), Variable())
-                self.checkRedeclared(_var, c)
-                c.append(_var)
-            elif isinstance(e, FuncDecl):
-                _paramList = []
-                _func = Symbol(e.name.name, MType(
-                    _paramList, Unknown()), Function())
-                self.checkRedeclared(_func, c)
-                c.append(_func)
+        decls = self.declareGlobals(ast.decl, c)
         self.checkEntryPoint(c)
-        [self.visit(x, c) for x in ast.decl]
+        for x in decls:
+            yield x, c
+        self.checkInferred()
 
     # variable : Id
     # varDimen : List[int] # empty list for scalar variable
     # varInit  : Literal   # null if no initial
     def visitVarDecl(self, ast, c):
-        varType = Unknown()
-        if len(ast.varDimen) != 0:
-            if ast.varInit != None:
-                elementType = self.visit(ast.varInit, c)
-                varType = ArrayType(ast.varDimen, elementType)
+        varType = self.paramType(ast)
+        if ast.varInit != None:
+            initType = self.unifier.find((yield ast.varInit, c))
+            if isinstance(varType, ArrayType):
+                # Only the element type has to agree with an array initialiser
+                if isinstance(initType, ArrayType):
+                    initType = initType.eletype
+                self.unify(varType.eletype, initType)
             else:
-                varType = ArrayType(ast.varDimen, Unknown())
-        elif ast.varInit != None:
-            varType = self.visit(ast.varInit, c)
+                varType = initType
 
         # Update type of symbol in scope
-        for symbol in c:
-            if symbol.name == ast.variable.name:
-                symbol.mtype = varType
+        c.lookup(ast.variable.name).mtype = varType
 
     # name: Id
     # param: List[VarDecl]
     # body: Tuple[List[VarDecl],List[Stmt]]
     def visitFuncDecl(self, ast, c):
-        paramList = []
-        for currentParam in ast.param:
-            _param = Symbol(currentParam.variable.name, Unknown(), Parameter())
-            self.checkRedeclared(_param, paramList)
-            paramList.append(_param)
-            self.visit(currentParam, c)
-
-        varList = paramList.copy()
-        for currentVarDecl in ast.body[0]:
-            _var = Symbol(currentVarDecl.variable.name, Unknown(), Variable())
-            self.checkRedeclared(_var, varList)
-            varList.append(_var)
-            self.visit(currentVarDecl, c)
-
-        # Making local scope including global symbol which is not declared in local
-        localScope = varList.copy()
-        localScopeHavingGlobalOnly = []  # Make it faster to update global symbol later
-        for symbolGlobal in c:
-            if not self.isNameInScope(symbolGlobal.name, localScope):
-                localScope.append(symbolGlobal)
-                localScopeHavingGlobalOnly.append(symbolGlobal)
-
-        [self.visit(_stmt, localScope) for _stmt in ast.body[1]]
-
-        #  Update type of global symbol
-        for symbolGlobal in c:
-            if self.isNameInScope(symbolGlobal.name, localScopeHavingGlobalOnly) and isinstance(symbolGlobal.mtype, Unknown):
-                symbolLocal = self.getSymbol(
-                    symbolGlobal.name, localScope)
-                symbolGlobal.mtype = symbolLocal.mtype
+        self.function = c.lookup(ast.name.name)
+        # Parameters and local variables share the function scope
+        c.enterScope()
+        try:
+            for param, _paramType in zip(ast.param, self.function.mtype.intype):
+                self.declare(c, Symbol(param.variable.name, _paramType, Parameter()))
+            yield from self.declareVariables(ast.body[0], c)
+            yield from self.visitStatements(ast.body[1], c)
+        finally:
+            c.exitScope()
+            self.function = None
 
     # arr:Expr
     # idx:List[Expr]
     def visitArrayCell(self, ast, c):
-        pass
+        arrType = self.unifier.find((yield ast.arr, c))
+        idxTypeList = []
+        for _idx in ast.idx:
+            idxTypeList.append((yield _idx, c))
+        if arrType is ERROR:
+            return ERROR
+        if not isinstance(arrType, ArrayType) or len(arrType.dimen) != len(ast.idx):
+            self.report(TypeMismatchInExpression(ast))
+            return ERROR
+        if not all([self.unify(_idxType, INT) for _idxType in idxTypeList]):
+            self.report(TypeMismatchInExpression(ast))
+            return ERROR
+        return arrType.eletype
 
     # op:str
     # left:Expr
     # right:Expr
     def visitBinaryOp(self, ast, c):
-        _op = ast.op
-        lhsType = self.visit(ast.left, c)
-        rhsType = self.visit(ast.right, c)
-        typeDict = self.getDictionary()
-
-        if isinstance(lhsType, Unknown):
-            if isinstance(ast.left, Id):
-                lhsType = typeDict[_op]['inType']
-                self.updateSymbolType(
-                    ast.left.name, c, typeDict[_op]['inType'])
-            elif isinstance(ast.left, CallExpr):
-                lhsType = typeDict[_op]['inType']
-                self.updateSymbolType(
-                    ast.left.method.name, c, typeDict[_op]['inType'])
-            elif isinstance(ast.left, ArrayCell):
-                pass
-
-        if isinstance(rhsType, Unknown):
-            if isinstance(ast.right, Id):
-                rhsType = typeDict[_op]['inType']
-                self.updateSymbolType(
-                    ast.right.name, c, typeDict[_op]['inType'])
-            elif isinstance(ast.right, CallExpr):
-                rhsType = typeDict[_op]['inType']
-                self.updateSymbolType(
-                    ast.right.method.name, c, typeDict[_op]['inType'])
-            elif isinstance(ast.left, ArrayCell):
-                pass
-
-        if lhsType != typeDict[ast.op]['inType'] or rhsType != typeDict[ast.op]['inType']:
-            raise TypeMismatchInExpression(ast)
-
-        return typeDict[_op]['outType']
+        inType, outType = BINARY_OP_TYPES[ast.op]
+        lhsType = yield ast.left, c
+        rhsType = yield ast.right, c
+        if not self.unify(lhsType, inType) or not self.unify(rhsType, inType):
+            self.report(TypeMismatchInExpression(ast))
+            return ERROR
+        return outType
 
     # op:str
     # body:Expr
-    def visitUnaryOp(self, ast, c,):
-        _op = ast.op
-        bodyType = self.visit(ast.body, c)
-        typeDict = self.getDictionary()
-        if isinstance(bodyType, Unknown):
-            if isinstance(ast.body, Id):
-                bodyType = typeDict[_op]['inType']
-                self.updateSymbolType(
-                    ast.body.name, c, typeDict[_op]['inType'])
-            elif isinstance(ast.body, CallExpr):
-                bodyType = typeDict[_op]['inType']
-                self.updateSymbolType(
-                    ast.body.method.name, c, typeDict[_op]['inType'])
-            elif isinstance(ast.left, ArrayCell):
-                pass
-
-        if bodyType != typeDict[ast.op]['inType']:
-            raise TypeMismatchInExpression(ast)
-
-        return typeDict[_op]['outType']
+    def visitUnaryOp(self, ast, c):
+        inType, outType = UNARY_OP_TYPES[ast.op]
+        bodyType = yield ast.body, c
+        if not self.unify(bodyType, inType):
+            self.report(TypeMismatchInExpression(ast))
+            return ERROR
+        return outType
 
     # method:Id
     # param:List[Expr]
     def visitCallExpr(self, ast, c):
-        self.checkUndeclared(ast.method.name, c, Function())
-        _callExprType = self.visit(ast.method, c)
-        if not isinstance(_callExprType.restype, VoidType) or len(ast.param) != len(_callExprType.intype):
-            raise TypeMismatchInExpression(ast)
-
-        _callExpr = self.getSymbol(ast.method.name, c)
-        argsTypeList = [self.visit(_param, c) for _param in ast.param]
-
-        for i in range(len(ast.param)):
-            _argType = argsTypeList[i]
-            _callExprIntype = _callExpr.mtype.intype[i]
-            if type(_argType) is Unknown:
-                if type(_callExprIntype) is Unknown:
-                    return TypeCannotBeInferred()
-                else:
-                    argIndex = self.getSymbolIndex(
-                        ast.param[i].name, c)
-                    c[argIndex].mtype = _callExprIntype
-                    argsTypeList[i] = _callExprIntype
-            else:
-                if type(_callExprIntype) is Unknown:
-                    _callExprIndex = self.getSymbolIndex(
-                        _callExpr.name, c)
-                    c[_callExprIndex].mtype.intype[i] = _argType
-                    _callExpr.mtype.intype[i] = _argType
-                elif type(_argType) != type(_callExprIntype):
-                    raise TypeMismatchInExpression(ast)
-        return _callExpr.mtype.restype
+        resType = yield from self.visitCall(ast, c, TypeMismatchInExpression(ast))
+        if resType is VOID:
+            self.report(TypeMismatchInExpression(ast))
+            return ERROR
+        return resType
 
     # value:int
     def visitIntLiteral(self, ast, c):
-        return IntType()
+        return INT
 
     # value:float
     def visitFloatLiteral(self, ast, c):
-        return FloatType()
+        return FLOAT
 
     # value: string
     def visitStringLiteral(self, ast, c):
-        return StringType()
+        return STRING
 
     # value:bool
     def visitBooleanLiteral(self, ast, c):
-        return BoolType()
+        return BOOL
 
     # value:List[Literal]
     def visitArrayLiteral(self, ast, c):
-        # if len(ast.value) == 0:
-        #     return Unknown()
-        # _value = [self.visit(e, c) for e in ast.value]
-        # return _value[0]
-        pass
+        eleType = TypeVariable()
+        for e in ast.value:
+            if not self.unify(eleType, (yield e, c)):
+                self.report(InvalidArrayLiteral(ast))
+                return ERROR
+        eleType = self.unifier.find(eleType)
+        if isinstance(eleType, ArrayType):
+            return ArrayType([len(ast.value)] + list(eleType.dimen), eleType.eletype)
+        return ArrayType([len(ast.value)], eleType)
 
     # lhs: LHS
     # rhs: Expr
     def visitAssign(self, ast, c):
-        lhsType = self.visit(ast.lhs, c)
-        rhsType = self.visit(ast.rhs, c)
-        if isinstance(lhsType, VoidType):
-            raise TypeMismatchInStatement(ast)
-
-        resultType = Unknown
-        if isinstance(lhsType, Unknown) and isinstance(rhsType, Unknown):
-            raise TypeCannotBeInferred(ast)
-        elif isinstance(lhsType, Unknown) and not isinstance(rhsType, Unknown):
-            resultType = rhsType
-        elif not isinstance(lhsType, Unknown) and isinstance(rhsType, Unknown):
-            resultType = lhsType
-        elif type(lhsType) != type(rhsType):
-            raise TypeMismatchInExpression(ast)
-
-        self.directInfer(ast.lhs, resultType, c)
-        self.directInfer(ast.rhs, resultType, c)
-
-        return resultType
+        lhsType = yield ast.lhs, c
+        rhsType = yield ast.rhs, c
+        if self.unifier.find(lhsType) is VOID:
+            self.report(TypeMismatchInStatement(ast))
+        elif not self.unify(lhsType, rhsType):
+            self.report(TypeMismatchInExpression(ast))
+        self.require(lhsType)
 
     # ifthenStmt:List[Tuple[Expr,List[VarDecl],List[Stmt]]]
     # elseStmt:Tuple[List[VarDecl],List[Stmt]] # for Else branch, empty list if no Else
     def visitIf(self, ast, c):
         # visiting if, and elseIf
         for i in range(len(ast.ifthenStmt)):
-            expType = self.visit(ast.ifthenStmt[i][0], c)
-            if not isinstance(expType, BoolType):
-                raise TypeMismatchInStatement(ast)
-
-            varList = []
-            for currentVarDecl in ast.ifthenStmt[i][1]:
-                _var = Symbol(currentVarDecl.variable.name,
-                              Unknown(), Variable())
-                self.checkRedeclared(_var, varList)
-                varList.append(_var)
-                self.visit(currentVarDecl, c)
-
-            localScope = varList.copy()
-            localScopeHavingGlobalOnly = []  # Make it faster to update global symbol later
-            for symbolGlobal in c:
-                if not self.isNameInScope(symbolGlobal.name, localScope):
-                    localScope.append(symbolGlobal)
-                    localScopeHavingGlobalOnly.append(symbolGlobal)
-
-            [self.visit(_stmt, localScope) for _stmt in ast.ifthenStmt[i][2]]
+            expType = yield ast.ifthenStmt[i][0], c
+            if not self.unify(expType, BOOL):
+                self.report(TypeMismatchInStatement(ast))
+
+            yield from self.visitBlock(ast.ifthenStmt[i][1:], c)
 
         # visiting else
-        varList = []
-        for currentVarDecl in ast.elseStmt[0]:
-            _var = Symbol(currentVarDecl.variable.name, Unknown(), Variable())
-            self.checkRedeclared(_var, varList)
-            varList.append(_var)
-            self.visit(currentVarDecl, c)
-
-        localScope = varList.copy()
-        localScopeHavingGlobalOnly = []  # Make it faster to update global symbol later
-        for symbolGlobal in c:
-            if not self.isNameInScope(symbolGlobal.name, localScope):
-                localScope.append(symbolGlobal)
-                localScopeHavingGlobalOnly.append(symbolGlobal)
-
-        [self.visit(_stmt, localScope) for _stmt in ast.elseStmt[1]]
+        yield from self.visitBlock(ast.elseStmt, c)
 
     # idx1: Id
     # expr1:Expr
@@ -431,31 +562,19 @@ class StaticChecker(BaseVisitor):
     # loop: Tuple[List[VarDecl],List[Stmt]]
 
     def visitFor(self, ast, c):
-        _idx1 = Symbol(ast.idx1.name, Unknown(), Variable())
-        c.append(_idx1)
-        self.visit(ast.idx1, c)
-        expr1Type = self.visit(ast.expr1, c)
-        expr2Type = self.visit(ast.expr2, c)
-        expr3Type = self.visit(ast.expr3, c)
-
-        if not isinstance(expr1Type, IntType) or not isinstance(expr3Type, IntType) or not isinstance(expr2Type, BoolType):
-            raise TypeMismatchInStatement(ast)
-
-        varList = []
-        for currentVarDecl in ast.loop[0]:
-            _var = Symbol(currentVarDecl.variable.name, Unknown(), Variable())
-            self.checkRedeclared(_var, varList)
-            varList.append(_var)
-            self.visit(currentVarDecl, c)
-
-        localScope = varList.copy()
-        localScopeHavingGlobalOnly = []  # Make it faster to update global symbol later
-        for symbolGlobal in c:
-            if not self.isNameInScope(symbolGlobal.name, localScope):
-                localScope.append(symbolGlobal)
-                localScopeHavingGlobalOnly.append(symbolGlobal)
-
-        [self.visit(_stmt, localScope) for _stmt in ast.loop[1]]
+        if c.lookup(ast.idx1.name) is None:
+            c.declare(Symbol(ast.idx1.name, TypeVariable(), Variable()))
+        idxType = yield ast.idx1, c
+        if not self.unify(idxType, INT):
+            self.report(TypeMismatchInStatement(ast))
+        expr1Type = yield ast.expr1, c
+        expr2Type = yield ast.expr2, c
+        expr3Type = yield ast.expr3, c
+
+        if not self.unify(expr1Type, INT) or not self.unify(expr3Type, INT) or not self.unify(expr2Type, BOOL):
+            self.report(TypeMismatchInStatement(ast))
+
+        yield from self.visitBlock(ast.loop, c)
 
     def visitBreak(self, ast, c):
         pass
@@ -465,82 +584,37 @@ class StaticChecker(BaseVisitor):
 
     # expr:Expr # None if no expression
     def visitReturn(self, ast, c):
-        expType = self.visit(ast.expr, c)
-        pass
+        expType = VOID if ast.expr is None else (yield ast.expr, c)
+        if not self.unify(expType, self.function.mtype.restype):
+            self.report(TypeMismatchInStatement(ast))
+        self.require(expType)
 
     # sl:Tuple[List[VarDecl],List[Stmt]]
     # exp: Expr
     def visitDowhile(self, ast, c):
-        varList = []
-        for currentVarDecl in ast.sl[0]:
-            _var = Symbol(currentVarDecl.variable.name, Unknown(), Variable())
-            self.checkRedeclared(_var, varList)
-            varList.append(_var)
-            self.visit(currentVarDecl, c)
-
-        localScope = varList.copy()
-        localScopeHavingGlobalOnly = []  # Make it faster to update global symbol later
-        for symbolGlobal in c:
-            if not self.isNameInScope(symbolGlobal.name, localScope):
-                localScope.append(symbolGlobal)
-                localScopeHavingGlobalOnly.append(symbolGlobal)
-
-        [self.visit(_stmt, localScope) for _stmt in ast.sl[1]]
-
-        expType = self.visit(ast.exp, localScope)
-        if not isinstance(expType, BoolType):
-            raise TypeMismatchInStatement(ast)
+        c.enterScope()
+        try:
+            yield from self.declareVariables(ast.sl[0], c)
+            yield from self.visitStatements(ast.sl[1], c)
+            # The condition still sees the declarations of the loop body
+            expType = yield ast.exp, c
+        finally:
+            c.exitScope()
+        if not self.unify(expType, BOOL):
+            self.report(TypeMismatchInStatement(ast))
 
     # exp: Expr
     # sl:Tuple[List[VarDecl],List[Stmt]]
     def visitWhile(self, ast, c):
-        expType = self.visit(ast.exp, c)
-        if not isinstance(expType, BoolType):
-            raise TypeMismatchInStatement(ast)
-
-        varList = []
-        for currentVarDecl in ast.sl[0]:
-            _var = Symbol(currentVarDecl.variable.name, Unknown(), Variable())
-            self.checkRedeclared(_var, varList)
-            varList.append(_var)
-            self.visit(currentVarDecl, c)
-
-        localScope = varList.copy()
-        localScopeHavingGlobalOnly = []  # Make it faster to update global symbol later
-        for symbolGlobal in c:
-            if not self.isNameInScope(symbolGlobal.name, localScope):
-                localScope.append(symbolGlobal)
-                localScopeHavingGlobalOnly.append(symbolGlobal)
-
-        [self.visit(_stmt, localScope) for _stmt in ast.sl[1]]
+        expType = yield ast.exp, c
+        if not self.unify(expType, BOOL):
+            self.report(TypeMismatchInStatement(ast))
+
+        yield from self.visitBlock(ast.sl, c)
 
     # method:Id
     # param:List[Expr]
     def visitCallStmt(self, ast, c):
-        self.checkUndeclared(ast.method.name, c, Function())
-        callStmtType = self.visit(ast.method, c)
-        if len(ast.param) != len(callStmtType.intype):
-            raise TypeMismatchInStatement(ast)
-
-        _callStmt = self.getSymbol(ast.method.name, c)
-        argsTypeList = [self.visit(_param, c) for _param in ast.param]
-
-        for i in range(len(ast.param)):
-            _argType = argsTypeList[i]
-            _callExprIntype = _callStmt.mtype.intype[i]
-            if type(_argType) is Unknown:
-                if type(_callExprIntype) is Unknown:
-                    return TypeCannotBeInferred()
-                else:
-                    argIndex = self.getSymbolIndex(
-                        ast.param[i].name, c)
-                    c[argIndex].mtype = _callExprIntype
-                    argsTypeList[i] = _callExprIntype
-            else:
-                if type(_callExprIntype) is Unknown:
-                    _callExprIndex = self.getSymbolIndex(
-                        _callStmt.name, c)
-                    c[_callExprIndex].mtype.intype[i] = _argType
-                    _callStmt.mtype.intype[i] = _argType
-                elif type(_argType) != type(_callExprIntype):
-                    raise TypeMismatchInExpression(ast)
+        resType = yield from self.visitCall(ast, c, TypeMismatchInStatement(ast))
+        if not self.unify(resType, VOID):
+            self.report(TypeMismatchInStatement(ast))
@@ -0,0 +1,74 @@
+"""
+ Checker fed with the declarations of a DeclarationStream one at a time.
+"""
+from AST import *
+from ASTParser import ParseError
+from StaticCheck import StaticChecker
+from StaticError import StaticError
+from lexererr import *
+
+
+class DeclarationMismatch(Exception):
+    """The two passes over a DeclarationStream read different declarations."""
+    pass
+
+
+def declarationKey(decl):
+    # (class, name) of a VarDecl or FuncDecl, the same for a header and
+    # the declaration it was read from
+    return type(decl), decl.variable.name if isinstance(decl, VarDecl) else decl.name.name
+
+
+class StreamingChecker(StaticChecker):
+    """StaticChecker of a program read through a DeclarationStream.
+
+    A body may call any function of the program, so the headers of all the
+    declarations are declared first, as visitProgram() does. Then each
+    declaration is checked as soon as the stream has parsed it and is
+    dropped afterwards: the memory used is that of the symbols and of the
+    largest declaration, not of the whole program. The errors are the ones
+    StaticChecker reports on the Program of the same source. A declaration
+    that is not the one of the header at its position raises
+    DeclarationMismatch.
+
+    Syntax errors come first, as when the whole program is parsed before
+    it is checked: before another error is raised, the rest of the source
+    is parsed, and its first syntax or lexer error, if any, is raised
+    instead.
+    """
+
+    def __init__(self, declarations):
+        super().__init__(None, declarations.names)
+        self.declarations = declarations
+
+    def check(self):
+        c = self.global_envi
+        try:
+            headers = self.declarations.headers()
+        except (ParseError, ErrorToken, UncloseString, IllegalEscape, UnterminatedComment):
+            # headers() skips the bodies, which may hold an earlier error
+            self.parseAll(iter(self.declarations))
+            raise
+        declarations = iter(self.declarations)
+        try:
+            declared = {id(e) for e in self.declareGlobals(headers, c)}
+            self.checkEntryPoint(c)
+            count = 0
+            for decl in declarations:
+                if count == len(headers) or declarationKey(headers[count]) != declarationKey(decl):
+                    raise DeclarationMismatch("declaration %d does not match its header" % count)
+                if id(headers[count]) in declared:
+                    self.visit(decl, c)
+                count += 1
+            if count != len(headers):
+                raise DeclarationMismatch("%d headers for %d declarations" % (len(headers), count))
+            self.checkInferred()
+        except (StaticError, DeclarationMismatch):
+            self.parseAll(declarations)
+            raise
+
+    @staticmethod
+    def parseAll(declarations):
+        # Parse the remaining declarations, raising at a syntax error
+        for _ in declarations:
+            pass
@@ -5,6 +5,9 @@ from lexererr import *
 }
 
 @lexer::members {
+# NameTable interning the text of ID tokens, if any
+names = None
+
 def emit(self):
     tk = self.type
     result = super().emit()
@@ -16,6 +19,9 @@ def emit(self):
         raise ErrorToken(result.text)
     elif tk == self.UNTERMINATED_COMMENT:
         raise UnterminatedComment()
+    elif tk == self.ID and self.names is not None:
+        result.text = self.names.intern(result.text)
+        return result
     else:
         return result;
 }
@@ -77,26 +83,24 @@ function_call: ID LB_ROUND (exp (CM exp)*)? RB_ROUND;
 
 statement_return: RETURN exp? SM;
 
-exp: exp1 ( OP_COMPARE_INT | OP_COMPARE_FLOAT) exp1 | exp1;
-exp1: exp1 (AND | OR) exp2 | exp2;
-exp2:
-	exp2 (ADD_INT | ADD_FLOAT | SUB_INT | SUB_FLOAT) exp3
-	| exp3;
-exp3:
-	exp3 (MUL_INT | MUL_FLOAT | DIV_INT | DIV_FLOAT | MOD_INT) exp4
-	| exp4;
+// Binary operators are left associative loops rather than left recursion,
+// and at most one comparison follows exp1. The choices of these rules are
+// made on LA(1), except the one between ID and call in operand, on LA(2)
+exp: exp1 (( OP_COMPARE_INT | OP_COMPARE_FLOAT) exp1)?;
+exp1: exp2 ((AND | OR) exp2)*;
+exp2: exp3 ((ADD_INT | ADD_FLOAT | SUB_INT | SUB_FLOAT) exp3)*;
+exp3: exp4 ((MUL_INT | MUL_FLOAT | DIV_INT | DIV_FLOAT | MOD_INT) exp4)*;
 exp4: NOT exp4 | exp5;
 exp5: (SUB_FLOAT | SUB_INT) exp5 | operand;
 
-operand: literal | ID | function_call | LB_ROUND exp RB_ROUND;
+// An array cell is an ID or call with indexes, told from a plain ID or call
+// by the LB_SQUARE after it, and ID from call by LA(2)
+operand:
+	literal
+	| (ID | function_call) (LB_SQUARE exp RB_SQUARE)*
+	| LB_ROUND exp RB_ROUND;
 
-literal:
-	INT
-	| FLOAT
-	| BOOLEAN
-	| array_literal
-	| STRING
-	| array_cell_decl;
+literal: INT | FLOAT | BOOLEAN | array_literal | STRING;
 
 array_literal: LB_CURLY ( exp (CM exp)*)? RB_CURLY;
 
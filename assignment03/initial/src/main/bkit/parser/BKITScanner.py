@@ -0,0 +1,168 @@
+"""
+ Hand-written lexer of BKIT, giving the tokens of the generated BKITLexer
+ without running the ANTLR lexer simulation: the kind of a token is chosen
+ by its first character and its end found by compiled regular expressions.
+"""
+import re
+from antlr4 import Token
+from antlr4.CommonTokenFactory import CommonTokenFactory
+from antlr4.Token import CommonToken
+from BKITLexer import BKITLexer
+from lexererr import *
+
+T = BKITLexer
+
+WS = re.compile(r"[ \t\r\n]+")
+ID = re.compile(r"[a-z][a-zA-Z0-9_]*")
+INT = r"0[xX][0-9A-F]*|0[oO][0-7]*|[1-9][0-9]*|0"
+INTEGER = re.compile(INT)
+FLOAT = re.compile(r"(?:%s)(?:\.[0-9]*(?:[eE][+-]?[0-9]+)*|[eE][+-]?[0-9]+)" % INT)
+# CHAR_LITERAL_IN_STRING*
+STRING = re.compile(r"(?:\\[btnfr'\\]|'\"|[^\n\\\"'])*")
+ESCAPES = "btnfr'\\"
+
+KEYWORDS = {
+    "Var": T.VAR, "Function": T.FUNCTION, "Parameter": T.PARAMETER, "Body": T.BODY,
+    "EndBody": T.ENDBODY, "If": T.IF, "Then": T.THEN, "ElseIf": T.ELSEIF, "Else": T.ELSE,
+    "EndIf": T.ENDIF, "For": T.FOR, "EndFor": T.ENDFOR, "While": T.WHILE, "Do": T.DO,
+    "EndWhile": T.ENDWHILE, "EndDo": T.ENDDO, "Break": T.BREAK, "Continue": T.CONTINUE,
+    "Return": T.RETURN, "True": T.BOOLEAN, "False": T.BOOLEAN,
+}
+OPERATORS = {
+    "=": T.ASSIGN, "+": T.ADD_INT, "-": T.SUB_INT, "*": T.MUL_INT, "\\": T.DIV_INT,
+    "%": T.MOD_INT, "==": T.OP_COMPARE_INT, "!=": T.OP_COMPARE_INT, "<": T.OP_COMPARE_INT,
+    ">": T.OP_COMPARE_INT, "<=": T.OP_COMPARE_INT, ">=": T.OP_COMPARE_INT,
+    "+.": T.ADD_FLOAT, "-.": T.SUB_FLOAT, "*.": T.MUL_FLOAT, "\\.": T.DIV_FLOAT,
+    "=/=": T.OP_COMPARE_FLOAT, "<.": T.OP_COMPARE_FLOAT, ">.": T.OP_COMPARE_FLOAT,
+    "<=.": T.OP_COMPARE_FLOAT, ">=.": T.OP_COMPARE_FLOAT, "!": T.NOT, "&&": T.AND,
+    "||": T.OR, "(": T.LB_ROUND, ")": T.RB_ROUND, "[": T.LB_SQUARE, "]": T.RB_SQUARE,
+    "{": T.LB_CURLY, "}": T.RB_CURLY, ":": T.COLON, ";": T.SM, ".": T.DOT, ",": T.CM,
+}
+
+
+def alternatives(words):
+    # Longest first, so that the first alternative matching is the longest
+    return re.compile("|".join(re.escape(word) for word in sorted(words, key=len, reverse=True)))
+
+
+KEYWORD = alternatives(KEYWORDS)
+OPERATOR = alternatives(OPERATORS)
+
+
+class ScannedToken(CommonToken):
+    # CommonToken with every field set in one call
+
+    def __init__(self, source, type, start, stop, line, column, text):
+        self.source = source
+        self.type = type
+        self.channel = Token.DEFAULT_CHANNEL
+        self.start = start
+        self.stop = stop
+        self.tokenIndex = -1
+        self.line = line
+        self.column = column
+        self._text = text
+
+
+class BKITScanner:
+    """TokenSource of the tokens BKITLexer gives for the same input.
+
+    Tokens have the same types, text, line and column, STRING loses its
+    quotes, WS and COMMENT are skipped, and the same lexererr exceptions
+    are raised when the erroneous token is reached. As with the ANTLR
+    lexer, the longest match wins and the rule first in BKIT.g4 wins a
+    tie. Identifiers are interned in names if set.
+    """
+
+    def __init__(self, input):
+        self._input = input
+        self._factory = CommonTokenFactory.DEFAULT
+        self._source = (self, input)
+        self.names = None
+        self.text = input.strdata
+        self.pos = input.index
+        self.line = 1
+        # Index of the first character of the current line
+        self.lineStart = 0
+
+    def getInputStream(self):
+        return self._input
+
+    def getSourceName(self):
+        return self._input.getSourceName()
+
+    @property
+    def column(self):
+        return self.pos - self.lineStart
+
+    def newLines(self, start, end):
+        count = self.text.count("\n", start, end)
+        if count:
+            self.line += count
+            self.lineStart = self.text.rindex("\n", start, end) + 1
+
+    def token(self, type, start, end, text):
+        self.pos = end
+        return ScannedToken(self._source, type, start, end - 1, self.line, start - self.lineStart, text)
+
+    def nextToken(self):
+        text = self.text
+        while True:
+            start = self.pos
+            if start >= len(text):
+                return self.token(Token.EOF, start, start, "<EOF>")
+            c = text[start]
+            if c in " \t\r\n":
+                end = WS.match(text, start).end()
+                self.newLines(start, end)
+                self.pos = end
+            elif "a" <= c <= "z":
+                end = ID.match(text, start).end()
+                name = text[start:end]
+                if self.names is not None:
+                    name = self.names.intern(name)
+                return self.token(T.ID, start, end, name)
+            elif "0" <= c <= "9":
+                return self.number(start)
+            elif c == "*" and text.startswith("*", start + 1):
+                # COMMENT: '**' .*? '**', else UNTERMINATED_COMMENT: '**'
+                end = text.find("**", start + 2) + 2
+                if end < 2:
+                    raise UnterminatedComment()
+                self.newLines(start, end)
+                self.pos = end
+            elif c == '"':
+                return self.string(start)
+            elif "A" <= c <= "Z":
+                match = KEYWORD.match(text, start)
+                if match is None:
+                    raise ErrorToken(c)
+                return self.token(KEYWORDS[match.group()], start, match.end(), match.group())
+            else:
+                match = OPERATOR.match(text, start)
+                if match is None:
+                    raise ErrorToken(c)
+                return self.token(OPERATORS[match.group()], start, match.end(), match.group())
+
+    def number(self, start):
+        end = INTEGER.match(self.text, start).end()
+        match = FLOAT.match(self.text, start)
+        # INT wins a tie, as in 0x1E5
+        if match is not None and match.end() > end:
+            return self.token(T.FLOAT, start, match.end(), match.group())
+        return self.token(T.INT, start, end, self.text[start:end])
+
+    def string(self, start):
+        text = self.text
+        end = STRING.match(text, start + 1).end()
+        if end < len(text):
+            c = text[end]
+            if c == '"':
+                return self.token(T.STRING, start, end + 1, text[start + 1:end])
+            if end + 1 < len(text) and (c == "\\" and text[end + 1] not in ESCAPES or
+                                        c == "'" and text[end + 1] != '"'):
+                raise IllegalEscape(text[start + 1:end + 2])
+        if end == start + 1:
+            # ERROR_CHAR comes before UNCLOSE_STRING for a lone quote
+            raise ErrorToken('"')
+        raise UncloseString(text[start + 1:end])
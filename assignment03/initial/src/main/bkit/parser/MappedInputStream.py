@@ -0,0 +1,72 @@
+"""
+ Character stream of a source file mapped in memory, for sources too large
+ to hold as FileStream does: the decoded text plus a list of its code
+ points.
+"""
+import mmap
+import os
+import re
+from antlr4 import InputStream, Token
+
+NON_ASCII = re.compile(rb"[\x80-\xff]")
+
+
+class MappedInputStream(InputStream):
+    """InputStream of a file read through mmap.
+
+    An ASCII file is lexed over the mapped bytes, whose values are its code
+    points; any other file is decoded from UTF-8 once. Text is only made
+    for the ranges asked with getText, so BKITLexer tokens get theirs when
+    their text is first read. strdata, which BKITScanner reads, decodes the
+    whole file on first use. The map stays open until close(), and the
+    file must not be truncated meanwhile.
+    """
+
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.name = fileName
+        with open(fileName, "rb") as file:
+            # An empty file cannot be mapped
+            if os.fstat(file.fileno()).st_size:
+                self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.map = b""
+        self.ascii = NON_ASCII.search(self.map) is None
+        self.data = self.map if self.ascii else str(self.map, "utf-8")
+        self._strdata = None if self.ascii else self.data
+        self._index = 0
+        self._size = len(self.data)
+
+    @property
+    def strdata(self):
+        if self._strdata is None:
+            self._strdata = str(self.map, "ascii")
+        return self._strdata
+
+    def LA(self, offset):
+        if offset > 0:
+            pos = self._index + offset - 1
+        elif offset < 0:
+            pos = self._index + offset
+        else:
+            return 0
+        if pos < 0 or pos >= self._size:
+            return Token.EOF
+        return self.data[pos] if self.ascii else ord(self.data[pos])
+
+    def LT(self, offset):
+        return self.LA(offset)
+
+    def getText(self, start, stop):
+        if start >= self._size:
+            return ""
+        if self.ascii:
+            return str(self.map[start:stop + 1], "ascii")
+        return self.data[start:stop + 1]
+
+    def close(self):
+        if isinstance(self.map, mmap.mmap):
+            self.map.close()
+
+    def __str__(self):
+        return self.strdata
@@ -0,0 +1,57 @@
+"""
+ Two-stage parsing with BKITParser: SLL prediction first, which decides
+ without full-context lookahead and stops at the first syntax error, then
+ full LL prediction only for the inputs where that fails.
+"""
+from antlr4 import CommonTokenStream
+from antlr4.atn.PredictionMode import PredictionMode
+from antlr4.error.ErrorListener import ConsoleErrorListener
+from antlr4.error.ErrorStrategy import BailErrorStrategy, DefaultErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
+from BKITLexer import BKITLexer
+from BKITParser import BKITParser
+from lexererr import *
+
+
+class TwoStageParser:
+    """Parser of the program rule giving the tree of BKITParser in LL mode.
+
+    An input is parsed with PredictionMode.SLL and a BailErrorStrategy.
+    If that stage raises a syntax or lexer error, the input is lexed and
+    parsed again in LL mode with the DefaultErrorStrategy, reporting to
+    listener, so that errors, and trees after recovery, are the ones of a
+    plain BKITParser. For an input SLL parses, the tree is the same.
+
+    One BKITParser, whose DFA cache is shared by every instance anyway, is
+    reused from one input to the next. Tokens come from lexer, BKITLexer
+    or BKITScanner. fallbacks counts the inputs parsed twice.
+    """
+
+    def __init__(self, listener=None, lexer=BKITLexer):
+        self.listener = ConsoleErrorListener.INSTANCE if listener is None else listener
+        self.lexer = lexer
+        self.parser = BKITParser(None)
+        self.bail = BailErrorStrategy()
+        self.fallbacks = 0
+
+    def parse(self, input):
+        """Parse tree of the program in input, a character stream."""
+        parser = self.parser
+        start = input.index
+        parser.setTokenStream(CommonTokenStream(self.lexer(input)))
+        parser._interp.predictionMode = PredictionMode.SLL
+        parser._errHandler = self.bail
+        parser.removeErrorListeners()
+        try:
+            return parser.program()
+        except (ParseCancellationException, ErrorToken, UncloseString, IllegalEscape, UnterminatedComment):
+            # A lexer error may come from a token SLL read ahead of where
+            # LL reports a syntax error
+            pass
+        self.fallbacks += 1
+        input.seek(start)
+        parser.setTokenStream(CommonTokenStream(self.lexer(input)))
+        parser._interp.predictionMode = PredictionMode.LL
+        parser._errHandler = DefaultErrorStrategy()
+        parser.addErrorListener(self.listener)
+        return parser.program()
@@ -11,5 +11,6 @@ class IllegalEscape(Exception):
     def __init__(self,s):
         self.message = "Illegal Escape In String: "+ s
 
-
-
+class UnterminatedComment(Exception):
+    def __init__(self):
+        self.message = "Unterminated Comment"
@@ -7,34 +7,44 @@ def printlist(lst,f=str,start="[",sepa=",",ending="]"):
 	return start + sepa.join(f(i) for i in lst) + ending
 
 class AST(ABC):
-    def __eq__(self, other): 
-        return self.__dict__ == other.__dict__
+    # Nodes keep their fields in __slots__, without a __dict__ per instance
+    __slots__ = ()
+
+    def __eq__(self, other):
+        # Dataclass nodes compare their fields, this covers Break and Continue
+        return type(self) is type(other)
 
     @abstractmethod
     def accept(self, v, param):
         return v.visit(self, param)
 
 class Stmt(AST):
+    __slots__ = ()
     __metaclass__ = ABCMeta
     pass
 
 class Decl(AST):
+    __slots__ = ()
     __metaclass__ = ABCMeta
     pass
 
 class Expr(AST):
+    __slots__ = ()
     __metaclass__ = ABCMeta
     pass
 
 class Literal(Expr):
+    __slots__ = ()
     __metaclass__ = ABCMeta
     pass
 class LHS(Expr):
+    __slots__ = ()
     __metaclass__ = ABCMeta
     pass
 
 @dataclass
 class Id(LHS):
+    __slots__ = ("name",)
     name : str
 
     def __str__(self):
@@ -46,6 +56,7 @@ class Id(LHS):
 
 @dataclass
 class Program(AST):
+    __slots__ = ("decl",)
     decl : List[Decl]
 
     def __str__(self):
@@ -56,6 +67,7 @@ class Program(AST):
 
 @dataclass    
 class VarDecl(Decl):
+    __slots__ = ("variable", "varDimen", "varInit")
     variable : Id
     varDimen : List[int] # empty list for scalar variable
     varInit  : Literal   # null if no initial
@@ -71,6 +83,7 @@ class VarDecl(Decl):
 
 @dataclass
 class FuncDecl(Decl):
+    __slots__ = ("name", "param", "body")
     name: Id
     param: List[VarDecl]
     body: Tuple[List[VarDecl],List[Stmt]]
@@ -85,6 +98,7 @@ class FuncDecl(Decl):
 
 @dataclass
 class ArrayCell(LHS):
+    __slots__ = ("arr", "idx")
     arr:Expr
     idx:List[Expr]
 
@@ -96,6 +110,7 @@ class ArrayCell(LHS):
 
 @dataclass
 class BinaryOp(Expr):
+    __slots__ = ("op", "left", "right")
     op:str
     left:Expr
     right:Expr
@@ -107,6 +122,7 @@ class BinaryOp(Expr):
         return v.visitBinaryOp(self, param)
 @dataclass
 class UnaryOp(Expr):
+    __slots__ = ("op", "body")
     op:str
     body:Expr
 
@@ -118,6 +134,7 @@ class UnaryOp(Expr):
 
 @dataclass
 class CallExpr(Expr):
+    __slots__ = ("method", "param")
     method:Id
     param:List[Expr]
 
@@ -131,6 +148,7 @@ class CallExpr(Expr):
 
 @dataclass
 class IntLiteral(Literal):
+    __slots__ = ("value",)
     value:int
 
     def __str__(self):
@@ -141,6 +159,7 @@ class IntLiteral(Literal):
 
 @dataclass
 class FloatLiteral(Literal):
+    __slots__ = ("value",)
     value:float
 
     def __str__(self):
@@ -150,6 +169,7 @@ class FloatLiteral(Literal):
         return v.visitFloatLiteral(self, param)
 @dataclass
 class StringLiteral(Literal):
+    __slots__ = ("value",)
     value:str
 
     def __str__(self):
@@ -159,6 +179,7 @@ class StringLiteral(Literal):
         return v.visitStringLiteral(self, param)
 @dataclass
 class BooleanLiteral(Literal):
+    __slots__ = ("value",)
     value:bool
 
     def __str__(self):
@@ -168,6 +189,7 @@ class BooleanLiteral(Literal):
         return v.visitBooleanLiteral(self, param)
 @dataclass
 class ArrayLiteral(Literal):
+    __slots__ = ("value",)
     value:List[Literal]
 
     def __str__(self):
@@ -178,6 +200,7 @@ class ArrayLiteral(Literal):
 
 @dataclass
 class Assign(Stmt):
+    __slots__ = ("lhs", "rhs")
     lhs: LHS
     rhs: Expr
 
@@ -201,6 +224,7 @@ class If(Stmt):
         List[VarDecl] is the list of declaration in the beginning of Then branch, empty list if no declaration
         List[Stmt] is the list of statement after the declaration in Then branch, empty list if no statement
     """
+    __slots__ = ("ifthenStmt", "elseStmt")
     ifthenStmt:List[Tuple[Expr,List[VarDecl],List[Stmt]]]
     elseStmt:Tuple[List[VarDecl],List[Stmt]] # for Else branch, empty list if no Else
 
@@ -214,6 +238,7 @@ class If(Stmt):
 
 @dataclass
 class For(Stmt):
+    __slots__ = ("idx1", "expr1", "expr2", "expr3", "loop")
     idx1: Id
     expr1:Expr
     expr2:Expr
@@ -232,6 +257,8 @@ class For(Stmt):
         return v.visitFor(self, param)
 
 class Break(Stmt):
+    __slots__ = ()
+
     def __str__(self):
         return "Break()"
 
@@ -239,6 +266,8 @@ class Break(Stmt):
         return v.visitBreak(self, param)
     
 class Continue(Stmt):
+    __slots__ = ()
+
     def __str__(self):
         return "Continue()"
 
@@ -247,6 +276,7 @@ class Continue(Stmt):
 
 @dataclass
 class Return(Stmt):
+    __slots__ = ("expr",)
     expr:Expr # None if no expression
 
     def __str__(self):
@@ -257,6 +287,7 @@ class Return(Stmt):
 
 @dataclass
 class Dowhile(Stmt):
+    __slots__ = ("sl", "exp")
     sl:Tuple[List[VarDecl],List[Stmt]]
     exp: Expr
 
@@ -268,6 +299,7 @@ class Dowhile(Stmt):
 
 @dataclass
 class While(Stmt):
+    __slots__ = ("exp", "sl")
     exp: Expr
     sl:Tuple[List[VarDecl],List[Stmt]]
     
@@ -280,6 +312,7 @@ class While(Stmt):
 
 @dataclass
 class CallStmt(Stmt):
+    __slots__ = ("method", "param")
     method:Id
     param:List[Expr]
 
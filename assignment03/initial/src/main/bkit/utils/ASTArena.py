@@ -0,0 +1,279 @@
+"""
+ Flat representation of an AST: the nodes are not Python objects but
+ entries of typed arrays, indexed by integer node ids.
+"""
+from array import array
+from AST import *
+from Visitor import BaseVisitor
+from NameTable import NameTable
+
+# How a field of a node is kept in the slots of the node
+NODE = 0        # id of the child
+OPTIONAL = 1    # id of the child, -1 for None
+STRING = 2      # id in the string table
+INT = 3         # index in the int pool
+FLOAT = 4       # index in the float pool
+BOOL = 5        # 0 or 1
+NODES = 6       # count, then the id of every child
+INTS = 7        # count, then the index of every int in the int pool
+BLOCK = 8       # Tuple[List[VarDecl],List[Stmt]] as two NODES
+CLAUSES = 9     # If.ifthenStmt: count, then an id and a BLOCK per clause
+
+# AST class -> how each of its fields is kept, in the order of the constructor
+LAYOUTS = {
+    Program: (NODES,),
+    VarDecl: (NODE, INTS, OPTIONAL),
+    FuncDecl: (NODE, NODES, BLOCK),
+    Id: (STRING,),
+    ArrayCell: (NODE, NODES),
+    BinaryOp: (STRING, NODE, NODE),
+    UnaryOp: (STRING, NODE),
+    CallExpr: (NODE, NODES),
+    IntLiteral: (INT,),
+    FloatLiteral: (FLOAT,),
+    StringLiteral: (STRING,),
+    BooleanLiteral: (BOOL,),
+    ArrayLiteral: (NODES,),
+    Assign: (NODE, NODE),
+    If: (CLAUSES, BLOCK),
+    For: (NODE, NODE, NODE, NODE, BLOCK),
+    Break: (),
+    Continue: (),
+    Return: (OPTIONAL,),
+    Dowhile: (BLOCK, NODE),
+    While: (NODE, BLOCK),
+    CallStmt: (NODE, NODES),
+}
+
+# kind of a node -> its AST class, and back
+KINDS = list(LAYOUTS)
+KIND_OF = {cls: kind for kind, cls in enumerate(KINDS)}
+
+# AST class -> field name -> position of the field
+FIELD_INDEX = {cls: {_name: i for i, _name in enumerate(cls.__slots__)} for cls in KINDS}
+
+
+class ASTArena:
+    """Struct of arrays holding the nodes of a tree.
+
+    Node i is of class KINDS[kinds[i]] and its fields are encoded, as
+    described by LAYOUTS, in slots[starts[i]:starts[i + 1]]. Children are
+    added before their parent, so the nodes of a subtree have consecutive
+    ids ending with the id of its root, and the root of the tree is the
+    last node. Identifiers, operators and string literals share one
+    NameTable of strings; int and float literals have their own pools, the int one becoming a
+    list if a literal does not fit in 64 bits.
+    A node takes about 15 bytes plus its literals.
+    """
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.starts = array('I', [0])
+        self.slots = array('i')
+        self.ints = array('q')
+        self.floats = array('d')
+        self.strings = NameTable()
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @staticmethod
+    def fromAST(ast):
+        arena = ASTArena()
+        ArenaBuilder().visit(ast, arena)
+        return arena
+
+    def string(self, value):
+        return self.strings.nameId(value)
+
+    def int(self, value):
+        # the pool stays an array('q') until a literal does not fit in 64 bits
+        try:
+            self.ints.append(value)
+        except OverflowError:
+            self.ints = list(self.ints)
+            self.ints.append(value)
+        return len(self.ints) - 1
+
+    def addNode(self, cls, slots):
+        self.kinds.append(KIND_OF[cls])
+        self.slots.extend(slots)
+        self.starts.append(len(self.slots))
+        return len(self.kinds) - 1
+
+    def nodeClass(self, nodeId):
+        return KINDS[self.kinds[nodeId]]
+
+    def root(self):
+        return Cursor(self, len(self.kinds) - 1)
+
+    def fields(self, nodeId, child):
+        """Field values of a node, with child(id) for its children."""
+        slots, ints = self.slots, self.ints
+        pos = self.starts[nodeId]
+        values = []
+        for layout in LAYOUTS[KINDS[self.kinds[nodeId]]]:
+            if layout == NODE:
+                values.append(child(slots[pos]))
+                pos += 1
+            elif layout == OPTIONAL:
+                values.append(None if slots[pos] < 0 else child(slots[pos]))
+                pos += 1
+            elif layout == STRING:
+                values.append(self.strings.name(slots[pos]))
+                pos += 1
+            elif layout == INT:
+                values.append(ints[slots[pos]])
+                pos += 1
+            elif layout == FLOAT:
+                values.append(self.floats[slots[pos]])
+                pos += 1
+            elif layout == BOOL:
+                values.append(slots[pos] == 1)
+                pos += 1
+            elif layout == NODES:
+                pos, nodes = self.nodeList(pos, child)
+                values.append(nodes)
+            elif layout == INTS:
+                count = slots[pos]
+                values.append([ints[i] for i in slots[pos + 1:pos + 1 + count]])
+                pos += 1 + count
+            elif layout == BLOCK:
+                pos, block = self.block(pos, child)
+                values.append(block)
+            else:
+                count = slots[pos]
+                pos += 1
+                clauses = []
+                for _ in range(count):
+                    exp = child(slots[pos])
+                    pos, (varDecls, stmts) = self.block(pos + 1, child)
+                    clauses.append((exp, varDecls, stmts))
+                values.append(clauses)
+        return values
+
+    def nodeList(self, pos, child):
+        count = self.slots[pos]
+        return pos + 1 + count, [child(i) for i in self.slots[pos + 1:pos + 1 + count]]
+
+    def block(self, pos, child):
+        pos, varDecls = self.nodeList(pos, child)
+        pos, stmts = self.nodeList(pos, child)
+        return pos, (varDecls, stmts)
+
+    def children(self, nodeId):
+        ids = []
+        self.fields(nodeId, ids.append)
+        return ids
+
+    def toAST(self, nodeId=None):
+        """AST classes for the subtree of a node, the whole tree by default."""
+        if nodeId is None:
+            nodeId = len(self.kinds) - 1
+        # Ids of the subtree, which are the consecutive ids ending at nodeId
+        first = nodeId
+        stack = [nodeId]
+        while stack:
+            for i in self.children(stack.pop()):
+                first = min(first, i)
+                stack.append(i)
+        # Children are converted before their parents, without recursion
+        nodes = {}
+        for i in range(first, nodeId + 1):
+            nodes[i] = self.nodeClass(i)(*self.fields(i, nodes.__getitem__))
+        return nodes[nodeId]
+
+
+class Cursor:
+    """A node of an ASTArena seen as a node of its AST class.
+
+    The fields of the AST class are read from the arena on access, with
+    cursors for the children, and isinstance() sees the AST class, so
+    visitors written for AST.py, such as StaticChecker, walk cursors too.
+    """
+    __slots__ = ("arena", "node")
+
+    def __init__(self, arena, node):
+        self.arena = arena
+        self.node = node
+
+    @property
+    def __class__(self):
+        return self.arena.nodeClass(self.node)
+
+    def __getattr__(self, _name):
+        index = FIELD_INDEX[self.arena.nodeClass(self.node)].get(_name)
+        if index is None:
+            raise AttributeError(_name)
+        return self.arena.fields(self.node, self.cursor)[index]
+
+    def cursor(self, node):
+        return Cursor(self.arena, node)
+
+    def accept(self, v, param):
+        return getattr(v, "visit" + self.__class__.__name__)(self, param)
+
+    def __eq__(self, other):
+        return type(other) is Cursor and other.arena is self.arena and other.node == self.node
+
+    def __hash__(self):
+        return hash((id(self.arena), self.node))
+
+    def __str__(self):
+        return str(self.arena.toAST(self.node))
+
+
+class ArenaBuilder(BaseVisitor):
+    """Adds the nodes of an AST to the arena given as param, children first."""
+
+    def visitNode(self, ast, arena):
+        slots = []
+        for layout, value in zip(LAYOUTS[type(ast)], [getattr(ast, f) for f in ast.__slots__]):
+            if layout == NODE:
+                slots.append((yield value, arena))
+            elif layout == OPTIONAL:
+                slots.append(-1 if value is None else (yield value, arena))
+            elif layout == STRING:
+                slots.append(arena.string(value))
+            elif layout == INT:
+                slots.append(arena.int(value))
+            elif layout == FLOAT:
+                slots.append(len(arena.floats))
+                arena.floats.append(value)
+            elif layout == BOOL:
+                slots.append(1 if value else 0)
+            elif layout == NODES:
+                ids = []
+                for e in value:
+                    ids.append((yield e, arena))
+                slots.append(len(ids))
+                slots.extend(ids)
+            elif layout == INTS:
+                slots.append(len(value))
+                for e in value:
+                    slots.append(arena.int(e))
+            elif layout == BLOCK:
+                for nodes in value:
+                    ids = []
+                    for e in nodes:
+                        ids.append((yield e, arena))
+                    slots.append(len(ids))
+                    slots.extend(ids)
+            else:
+                slots.append(len(value))
+                for exp, varDecls, stmts in value:
+                    slots.append((yield exp, arena))
+                    for nodes in (varDecls, stmts):
+                        ids = []
+                        for e in nodes:
+                            ids.append((yield e, arena))
+                        slots.append(len(ids))
+                        slots.extend(ids)
+        return arena.addNode(type(ast), slots)
+
+    visitProgram = visitVarDecl = visitFuncDecl = visitId = visitArrayCell = \
+        visitBinaryOp = visitUnaryOp = visitCallExpr = visitIntLiteral = \
+        visitFloatLiteral = visitStringLiteral = visitBooleanLiteral = \
+        visitArrayLiteral = visitAssign = visitIf = visitFor = visitBreak = \
+        visitContinue = visitReturn = visitDowhile = visitWhile = \
+        visitCallStmt = visitNode
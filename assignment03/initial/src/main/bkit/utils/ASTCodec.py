@@ -0,0 +1,342 @@
+"""
+ Versioned binary encoding of the AST.
+
+ An encoded AST is a header, MAGIC, the format VERSION, a byte of flags
+ and the length of the body as 8 bytes little endian, then the body,
+ compressed with zlib if flags has COMPRESSED set. The body holds the
+ nodes in preorder, each one as its tag, then its scalar fields, then its
+ child nodes. The fields of every class are those of ASTArena.LAYOUTS,
+ written as:
+
+    NODE        the child
+    OPTIONAL    0 for None, else 1 and the child
+    STRING      varint id of the string; a new string takes the next id
+                and is followed by the varint length and UTF-8 bytes
+    INT         zigzag varint, of any size
+    FLOAT       8 bytes IEEE 754 little endian
+    BOOL        0 or 1
+    NODES       varint count, then the children
+    INTS        varint count, then the zigzag varints
+    BLOCK       NODES of VarDecl, then NODES of Stmt
+    CLAUSES     varint count, then the expression and BLOCK of each clause
+
+ Several ASTs can follow each other in one file.
+"""
+import struct
+from struct import Struct
+import zlib
+from ASTArena import LAYOUTS, KINDS, NODE, OPTIONAL, STRING, INT, FLOAT, BOOL, NODES, INTS, BLOCK, CLAUSES
+
+MAGIC = b"BKAST"
+VERSION = 1
+COMPRESSED = 1
+
+HEADER = Struct("<5sBBQ")
+DOUBLE = Struct("<d")
+
+# tag of a class: its kind in ASTArena, plus one
+TAGS = {cls: kind + 1 for kind, cls in enumerate(KINDS)}
+# tag -> (class, (layout, field name) of every field, whether the class is
+# built by cls(*scalars, *children), its scalars coming before its NODEs)
+CLASSES = [None] + [(cls, tuple(zip(LAYOUTS[cls], cls.__slots__)),
+                     all(layout in (NODE, STRING, INT, FLOAT, BOOL) for layout in LAYOUTS[cls]) and
+                     list(LAYOUTS[cls]) == sorted(LAYOUTS[cls], key=lambda layout: layout == NODE))
+                    for cls in KINDS]
+
+
+class ASTFormatError(ValueError):
+    pass
+
+
+def writeVarint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def writeInt(out, value):
+    # zigzag: 0, -1, 1, -2... as 0, 1, 2, 3...
+    value = value << 1 if value >= 0 else (-value << 1) - 1
+    if value < 0x80:
+        out.append(value)
+    else:
+        writeVarint(out, value)
+
+
+def writeString(out, value, strings):
+    index = strings.get(value)
+    if index is None:
+        index = strings[value] = len(strings)
+        data = value.encode()
+        writeVarint(out, index)
+        writeVarint(out, len(data))
+        out += data
+    elif index < 0x80:
+        out.append(index)
+    else:
+        writeVarint(out, index)
+
+
+def writeNodes(out, nodes, children):
+    count = len(nodes)
+    if count < 0x80:
+        out.append(count)
+    else:
+        writeVarint(out, count)
+    children.extend(nodes)
+
+
+def encodeBody(ast, out):
+    # Preorder without recursion: the children of a node are pushed on the
+    # stack in reverse once its tag and scalars are written
+    strings = {}
+    stack = [ast]
+    while stack:
+        node = stack.pop()
+        tag = TAGS[type(node)]
+        out.append(tag)
+        children = []
+        for layout, _name in CLASSES[tag][1]:
+            value = getattr(node, _name)
+            if layout == NODE:
+                children.append(value)
+            elif layout == STRING:
+                writeString(out, value, strings)
+            elif layout == NODES:
+                writeNodes(out, value, children)
+            elif layout == INT:
+                writeInt(out, value)
+            elif layout == OPTIONAL:
+                if value is None:
+                    out.append(0)
+                else:
+                    out.append(1)
+                    children.append(value)
+            elif layout == BLOCK:
+                writeNodes(out, value[0], children)
+                writeNodes(out, value[1], children)
+            elif layout == INTS:
+                writeVarint(out, len(value))
+                for e in value:
+                    writeInt(out, e)
+            elif layout == FLOAT:
+                out += DOUBLE.pack(value)
+            elif layout == BOOL:
+                out.append(1 if value else 0)
+            else:
+                writeVarint(out, len(value))
+                for exp, varDecls, stmts in value:
+                    children.append(exp)
+                    writeNodes(out, varDecls, children)
+                    writeNodes(out, stmts, children)
+        children.reverse()
+        stack.extend(children)
+
+
+def dumps(ast, compress=False):
+    """The encoding of ast, header included, as bytes."""
+    body = bytearray()
+    encodeBody(ast, body)
+    if compress:
+        body = zlib.compress(body, 1)
+    return HEADER.pack(MAGIC, VERSION, COMPRESSED if compress else 0, len(body)) + body
+
+
+def dump(ast, file, compress=False):
+    """Write the encoding of ast to a binary file object."""
+    file.write(dumps(ast, compress))
+
+
+class Decoder:
+    """Reads the body of one encoded AST."""
+
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+        self.strings = []
+
+    def varint(self):
+        data = self.data
+        value = data[self.pos]
+        self.pos += 1
+        if value < 0x80:
+            return value
+        value &= 0x7F
+        shift = 7
+        while True:
+            byte = data[self.pos]
+            self.pos += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def int(self):
+        value = self.varint()
+        return -((value + 1) >> 1) if value & 1 else value >> 1
+
+    def string(self):
+        index = self.varint()
+        if index == len(self.strings):
+            length = self.varint()
+            if self.pos + length > len(self.data):
+                raise ASTFormatError("truncated string")
+            self.strings.append(bytes(self.data[self.pos:self.pos + length]).decode())
+            self.pos += length
+        return self.strings[index]
+
+    def scalars(self, fields):
+        # Values of the scalar fields, with the number of children for
+        # NODE, OPTIONAL and the lists, in field order, and the number of
+        # children that follow
+        values = []
+        count = 0
+        for layout, _ in fields:
+            if layout == NODE:
+                count += 1
+            elif layout == STRING:
+                values.append(self.string())
+            elif layout == NODES:
+                n = self.varint()
+                values.append(n)
+                count += n
+            elif layout == INT:
+                values.append(self.int())
+            elif layout == OPTIONAL:
+                n = self.data[self.pos]
+                self.pos += 1
+                values.append(n)
+                count += n
+            elif layout == BLOCK:
+                n, m = self.varint(), self.varint()
+                values.append(n)
+                values.append(m)
+                count += n + m
+            elif layout == INTS:
+                values.append([self.int() for _ in range(self.varint())])
+            elif layout == FLOAT:
+                if self.pos + 8 > len(self.data):
+                    raise ASTFormatError("truncated float")
+                values.append(DOUBLE.unpack_from(self.data, self.pos)[0])
+                self.pos += 8
+            elif layout == BOOL:
+                values.append(self.data[self.pos] == 1)
+                self.pos += 1
+            else:
+                clauses = self.varint()
+                values.append(clauses)
+                count += clauses
+                for _ in range(clauses):
+                    n, m = self.varint(), self.varint()
+                    values.append(n)
+                    values.append(m)
+                    count += n + m
+        return values, count
+
+    @staticmethod
+    def build(cls, fields, values, children):
+        # The node of class cls from its scalars and decoded children
+        args = []
+        scalar = child = 0
+        for layout, _ in fields:
+            if layout == NODE:
+                args.append(children[child])
+                child += 1
+            elif layout == OPTIONAL:
+                args.append(children[child] if values[scalar] else None)
+                child += values[scalar]
+                scalar += 1
+            elif layout == NODES:
+                n = values[scalar]
+                args.append(children[child:child + n])
+                scalar += 1
+                child += n
+            elif layout == BLOCK:
+                n, m = values[scalar], values[scalar + 1]
+                args.append((children[child:child + n], children[child + n:child + n + m]))
+                scalar += 2
+                child += n + m
+            elif layout == CLAUSES:
+                clauses = []
+                for i in range(values[scalar]):
+                    n, m = values[scalar + 1 + 2 * i], values[scalar + 2 + 2 * i]
+                    clauses.append((children[child], children[child + 1:child + 1 + n],
+                                    children[child + 1 + n:child + 1 + n + m]))
+                    child += 1 + n + m
+                args.append(clauses)
+                scalar += 1 + 2 * values[scalar]
+            else:
+                args.append(values[scalar])
+                scalar += 1
+        return cls(*args)
+
+    def decode(self):
+        # Frames of the nodes whose children are being decoded:
+        # [tag, scalars, number of children, children]
+        root = []
+        stack = [[0, None, 1, root]]
+        while True:
+            frame = stack[-1]
+            if len(frame[3]) == frame[2]:
+                stack.pop()
+                if not stack:
+                    return root[0]
+                cls, fields, simple = CLASSES[frame[0]]
+                if simple:
+                    node = cls(*frame[1], *frame[3])
+                else:
+                    node = self.build(cls, fields, frame[1], frame[3])
+                stack[-1][3].append(node)
+                continue
+            tag = self.data[self.pos]
+            self.pos += 1
+            cls, fields, simple = CLASSES[tag]
+            values, count = self.scalars(fields)
+            if count != 0:
+                stack.append([tag, values, count, []])
+            elif simple:
+                frame[3].append(cls(*values))
+            else:
+                frame[3].append(self.build(cls, fields, values, []))
+
+
+def loads(data):
+    """The AST encoded in data, a bytes-like object.
+    Raises ASTFormatError unless data is exactly one well-formed encoded AST."""
+    if len(data) < HEADER.size:
+        raise ASTFormatError("truncated AST header")
+    magic, version, flags, length = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ASTFormatError("not an encoded AST")
+    if version != VERSION:
+        raise ASTFormatError("unsupported AST format version %d" % version)
+    body = memoryview(data)[HEADER.size:HEADER.size + length]
+    if len(body) != length:
+        raise ASTFormatError("truncated AST")
+    if len(data) != HEADER.size + length:
+        raise ASTFormatError("trailing bytes after the AST")
+    try:
+        if flags & COMPRESSED:
+            body = zlib.decompress(body)
+        decoder = Decoder(body)
+        ast = decoder.decode()
+    except ASTFormatError:
+        raise
+    except (IndexError, TypeError, ValueError, struct.error, zlib.error) as e:
+        # ValueError covers UnicodeDecodeError
+        raise ASTFormatError("corrupted AST") from e
+    if decoder.pos != len(body):
+        raise ASTFormatError("trailing bytes in the AST body")
+    return ast
+
+
+def load(file):
+    """Read the next encoded AST of a binary file object.
+    Raises EOFError at the end of the file, as pickle.load() does."""
+    header = file.read(HEADER.size)
+    if not header:
+        raise EOFError()
+    if len(header) < HEADER.size:
+        return loads(header)
+    return loads(header + file.read(HEADER.unpack(header)[3]))
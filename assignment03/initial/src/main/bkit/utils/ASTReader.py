@@ -0,0 +1,265 @@
+"""
+ Reader of the text form of an AST, as printed by the __str__ methods of
+ AST.py, giving back the AST objects without going through the source.
+"""
+from AST import *
+
+
+class ASTSyntaxError(ValueError):
+    def __init__(self, message, pos):
+        super().__init__("%s at %d" % (message, pos))
+        self.pos = pos
+
+
+def makeVarDecl(items):
+    # VarDecl(Id(x)) with ,[dimensions] and ,initial value when present
+    varDimen = []
+    varInit = None
+    for item in items[1:]:
+        if isinstance(item, list):
+            varDimen = item
+        else:
+            varInit = item
+    return VarDecl(items[0], varDimen, varInit)
+
+
+def addElseIf(items, parent):
+    # If(...)ElseIf(exp,[decls],[stmts]) adds a clause to the If before it
+    parent[-1].ifthenStmt.append(tuple(items))
+
+
+def addElse(items, parent):
+    parent[-1].elseStmt = tuple(items)
+
+
+# name -> function making the node from the items between its parentheses,
+# or, for ElseIf and Else, adding them to the If printed before them
+BUILDERS = {
+    "Program": lambda items: Program(*items),
+    "VarDecl": makeVarDecl,
+    "FuncDecl": lambda items: FuncDecl(*items),
+    "ArrayCell": lambda items: ArrayCell(*items),
+    "BinaryOp": lambda items: BinaryOp(*items),
+    "UnaryOp": lambda items: UnaryOp(*items),
+    "CallExpr": lambda items: CallExpr(*items),
+    "ArrayLiteral": lambda items: ArrayLiteral(items),
+    "Assign": lambda items: Assign(*items),
+    "If": lambda items: If([tuple(items)], ()),
+    "For": lambda items: For(items[0], items[1], items[2], items[3], (items[4], items[5])),
+    "Break": lambda items: Break(*items),
+    "Continue": lambda items: Continue(*items),
+    "Return": lambda items: Return(*items) if items else Return(None),
+    "Dowhile": lambda items: Dowhile((items[0], items[1]), items[2]),
+    "While": lambda items: While(items[0], (items[1], items[2])),
+    "CallStmt": lambda items: CallStmt(*items),
+}
+ADDERS = {"ElseIf": addElseIf, "Else": addElse}
+
+# name -> the fields printed by str() in every form of the node, a kind
+# per field: e an expression, i an Id, s a statement, v a VarDecl, o an
+# operator, t the tuple of a FuncDecl body, and for lists E of
+# expressions, S of statements, V of VarDecls, D of declarations and N of
+# dimensions. The items of ArrayLiteral are expressions.
+FIELDS = {
+    "Program": ["D"], "VarDecl": ["i", "iN", "ie", "iNe"], "FuncDecl": ["iVt"],
+    "ArrayCell": ["eE"], "BinaryOp": ["oee"], "UnaryOp": ["oe"], "CallExpr": ["iE"],
+    "Assign": ["ee"], "If": ["eVS"], "ElseIf": ["eVS"], "Else": ["VS"], "For": ["ieeeVS"],
+    "Break": [""], "Continue": [""], "Return": ["", "e"], "Dowhile": ["VSe"],
+    "While": ["eVS"], "CallStmt": ["iE"], "(": ["VS"],
+}
+# kind of a field -> the kinds of the items it takes, L being a list and
+# d a dimension
+ACCEPTS = {"e": "ei", "i": "i", "s": "s", "v": "v", "o": "o", "t": "t",
+           "E": "L", "S": "L", "V": "L", "D": "L", "N": "L"}
+ELEMENTS = {"E": "ei", "S": "s", "V": "v", "D": "vf", "N": "d"}
+# name -> the kind of the node, when not an expression
+KINDS = {"Id": "i", "VarDecl": "v", "FuncDecl": "f", "Program": "p", "Assign": "s", "If": "s",
+         "For": "s", "Break": "s", "Continue": "s", "Return": "s", "Dowhile": "s", "While": "s",
+         "CallStmt": "s"}
+TYPE_KINDS = {list: "L", tuple: "t", str: "o"}
+TYPE_KINDS.update((globals()[_name], k) for _name, k in KINDS.items())
+# (name, kinds, full) -> whether fits() holds for them
+MATCHES = {}
+
+# name -> class of the leaves holding the raw text between their parentheses
+LEAVES = {
+    "Id": Id,
+    "IntLiteral": lambda text: IntLiteral(int(text)),
+    "FloatLiteral": lambda text: FloatLiteral(float(text)),
+    "BooleanLiteral": lambda text: BooleanLiteral({"true": True, "false": False}[text]),
+}
+
+# names of the nodes, each followed by (
+NAMES = set(BUILDERS) | set(ADDERS) | set(LEAVES) | {"StringLiteral"}
+
+
+def nameKind(_name):
+    # The kind of the item a node of that name is, None for ElseIf and Else
+    return None if _name in ADDERS else KINDS.get(_name, "e")
+
+
+def fits(stack, frame, kinds, full):
+    # Whether the items of stack[frame] followed by items of the given
+    # kinds make a form of its node, or the start of one unless full
+    _name, items = stack[frame]
+    if _name == "[" or _name == "ArrayLiteral":
+        element = "ei" if _name == "ArrayLiteral" else listElements(stack, frame)
+        return element is None or all(k in element for k in kinds)
+    key = (_name, "".join([TYPE_KINDS.get(type(item), "e") for item in items]) + kinds, full)
+    if key not in MATCHES:
+        MATCHES[key] = any((len(form) == len(key[1]) if full else len(form) >= len(key[1])) and
+                           all(k in ACCEPTS[f] for f, k in zip(form, key[1]))
+                           for form in FIELDS[_name])
+    return MATCHES[key]
+
+
+def listElements(stack, frame):
+    # The kinds of the items of the list stack[frame], None if unknown
+    if frame < 2:
+        return None
+    _name, items = stack[frame - 1]
+    for form in FIELDS.get(_name, ()):
+        if len(form) > len(items) and form[len(items)] in ELEMENTS:
+            return ELEMENTS[form[len(items)]]
+    return None
+
+
+def itemKind(text, pos):
+    # The kind of the item starting at pos, or None
+    if text.startswith("([", pos):
+        return "t"
+    if text.startswith("[", pos):
+        return "L" if text.startswith("]", pos + 1) or itemKind(text, pos + 1) else None
+    digit = pos + 1 if text.startswith("-", pos) else pos
+    if digit < len(text) and text[digit].isdigit():
+        return "d"
+    paren = text.find("(", pos, pos + 16)
+    return nameKind(text[pos:paren]) if paren > pos and text[pos:paren] in NAMES else None
+
+
+def continuesAST(text, pos, stack):
+    # Whether the text from pos can follow a StringLiteral read as the last
+    # item of the innermost frame of stack: the ) and ] of the frames it
+    # closes, each frame then holding a form of its node, then the end of
+    # the text, or the next item of the frame after a comma, or after a )
+    # or ] the ElseIf, Else or list that may follow them
+    frame = len(stack) - 1
+    pending = "e"
+    closed = None
+    while pos < len(text) and text[pos] in ")]":
+        closed = stack[frame][0]
+        if frame == 0 or (text[pos] == "]") != (closed == "[") or \
+                not fits(stack, frame, pending, True):
+            return False
+        frame -= 1
+        pos += 1
+        pending = {"[": "L", "(": "t"}.get(closed) or nameKind(closed) or ""
+    if pos == len(text) or frame == 0:
+        return pos == len(text) and frame == 0
+    if text.startswith(",", pos):
+        item = itemKind(text, pos + 1)
+    elif text.startswith(("ElseIf(", "Else("), pos):
+        return closed in ("If", "ElseIf")
+    elif text.startswith("[", pos) and closed is not None:
+        item = itemKind(text, pos)
+    else:
+        return False
+    return item is not None and fits(stack, frame, pending + item, False)
+
+
+def stringEnd(text, pos, stack):
+    # The ) closing a StringLiteral whose value starts at pos, stack being
+    # the frames around it: the first one the rest of the text can follow
+    while True:
+        close = text.find(")", pos)
+        if close < 0:
+            raise ASTSyntaxError("unclosed StringLiteral", pos)
+        pos = close + 1
+        if continuesAST(text, pos, stack):
+            return close
+
+
+def readAST(text):
+    """The AST whose str() is text, in one pass over it.
+
+    The text has no quotes around string literals: the value of one is
+    read up to the first ) the rest of the text can follow, closing the
+    nodes and lists around the literal with fields of the kinds str()
+    prints for them, so a value may hold unbalanced ( ) [ and ]. A value
+    whose ) is followed by text reading as such a continuation, like the
+    item "a),StringLiteral(b" of an ArrayLiteral, cannot be told apart
+    from the end of the literal and is read up to that ).
+    """
+    text = text.strip()
+    # Frames of the nodes, lists and tuples being read: [name, items],
+    # with "[" and "(" as the names of lists and tuples
+    root = []
+    stack = [[None, root]]
+    pos, end = 0, len(text)
+    while pos < end:
+        c = text[pos]
+        if c == ",":
+            pos += 1
+        elif c == ")" or c == "]":
+            if len(stack) == 1 or (c == "]") != (stack[-1][0] == "["):
+                raise ASTSyntaxError("unexpected %s" % c, pos)
+            _name, items = stack.pop()
+            parent = stack[-1][1]
+            pos += 1
+            try:
+                if _name == "[":
+                    parent.append(items)
+                elif _name == "(":
+                    parent.append(tuple(items))
+                elif _name in ADDERS:
+                    ADDERS[_name](items, parent)
+                else:
+                    parent.append(BUILDERS[_name](items))
+            except (TypeError, IndexError, AttributeError):
+                raise ASTSyntaxError("wrong fields for %s" % _name, pos - 1)
+        elif c == "[" or c == "(":
+            stack.append([c, []])
+            pos += 1
+        elif c.isdigit() or c == "-":
+            # dimension of a VarDecl
+            close = pos + 1
+            while close < end and text[close].isdigit():
+                close += 1
+            if not text[close - 1].isdigit():
+                raise ASTSyntaxError("no digits in dimension", pos)
+            stack[-1][1].append(int(text[pos:close]))
+            pos = close
+        else:
+            paren = text.find("(", pos)
+            _name = text[pos:paren]
+            if paren < 0 or not (_name in BUILDERS or _name in ADDERS or
+                                 _name in LEAVES or _name == "StringLiteral"):
+                raise ASTSyntaxError("unknown node", pos)
+            pos = paren + 1
+            if _name in LEAVES:
+                close = text.find(")", pos)
+                if close < 0:
+                    raise ASTSyntaxError("unclosed %s" % _name, pos)
+                try:
+                    stack[-1][1].append(LEAVES[_name](text[pos:close]))
+                except (ValueError, KeyError):
+                    raise ASTSyntaxError("wrong value for %s" % _name, pos)
+                pos = close + 1
+            elif _name == "StringLiteral":
+                close = stringEnd(text, pos, stack)
+                stack[-1][1].append(StringLiteral(text[pos:close]))
+                pos = close + 1
+            elif _name == "BinaryOp" or _name == "UnaryOp":
+                # The operator is the raw text up to the first comma
+                comma = text.find(",", pos)
+                if comma < 0:
+                    raise ASTSyntaxError("no operand for %s" % _name, pos)
+                stack.append([_name, [text[pos:comma]]])
+                pos = comma + 1
+            else:
+                stack.append([_name, []])
+    if len(stack) != 1:
+        raise ASTSyntaxError("unclosed %s" % stack[-1][0], end)
+    if len(root) != 1:
+        raise ASTSyntaxError("expected one AST", end)
+    return root[0]
@@ -0,0 +1,138 @@
+"""
+ Writer of the text form of an AST, the same text as the __str__ methods of
+ AST.py give, without recursion and without building the text of every
+ subtree: the pieces go to one buffer, or to a file as they are made.
+"""
+from AST import *
+
+# Pieces buffered before a write to the file
+CHUNK = 4096
+
+
+def listPieces(pieces, lst, start="[", sepa=",", ending="]"):
+    # printlist
+    pieces.append(start)
+    for i, e in enumerate(lst):
+        if i:
+            pieces.append(sepa)
+        pieces.append(e)
+    pieces.append(ending)
+    return pieces
+
+
+def blockPieces(pieces, stmt):
+    # printListStmt
+    listPieces(pieces, stmt[0])
+    pieces.append(",")
+    return listPieces(pieces, stmt[1])
+
+
+def varDeclPieces(node):
+    pieces = ["VarDecl(", node.variable]
+    if node.varDimen:
+        pieces.append(",")
+        listPieces(pieces, node.varDimen)
+    if node.varInit:
+        pieces.append(",")
+        pieces.append(node.varInit)
+    pieces.append(")")
+    return pieces
+
+
+def funcDeclPieces(node):
+    pieces = ["FuncDecl(", node.name]
+    listPieces(pieces, node.param)
+    pieces.append(",(")
+    listPieces(pieces, node.body[0])
+    listPieces(pieces, node.body[1])
+    pieces.append("))")
+    return pieces
+
+
+def ifPieces(node):
+    pieces = ["If("]
+    for i, (exp, varDecls, stmts) in enumerate(node.ifthenStmt):
+        if i:
+            pieces.append(")ElseIf(")
+        pieces.append(exp)
+        pieces.append(",")
+        blockPieces(pieces, (varDecls, stmts))
+    pieces.append(")")
+    if node.elseStmt:
+        pieces.append("Else(")
+        blockPieces(pieces, node.elseStmt)
+        pieces.append(")")
+    return pieces
+
+
+# class -> function giving the pieces of the text of a node: strings written
+# as they are, and child nodes or values written in their place
+PIECES = {
+    Program: lambda node: listPieces(["Program("], node.decl) + [")"],
+    VarDecl: varDeclPieces,
+    FuncDecl: funcDeclPieces,
+    ArrayCell: lambda node: listPieces(["ArrayCell(", node.arr, ","], node.idx) + [")"],
+    BinaryOp: lambda node: ["BinaryOp(" + node.op + ",", node.left, ",", node.right, ")"],
+    UnaryOp: lambda node: ["UnaryOp(" + node.op + ",", node.body, ")"],
+    CallExpr: lambda node: listPieces(["CallExpr(", node.method, ","], node.param) + [")"],
+    ArrayLiteral: lambda node: listPieces([], node.value, "ArrayLiteral(", ",", ")"),
+    Assign: lambda node: ["Assign(", node.lhs, ",", node.rhs, ")"],
+    If: ifPieces,
+    For: lambda node: blockPieces(["For(", node.idx1, ",", node.expr1, ",", node.expr2, ",",
+                                   node.expr3, ","], node.loop) + [")"],
+    Return: lambda node: ["Return()"] if node.expr is None else ["Return(", node.expr, ")"],
+    Dowhile: lambda node: blockPieces(["Dowhile("], node.sl) + [",", node.exp, ")"],
+    While: lambda node: blockPieces(["While(", node.exp, ","], node.sl) + [")"],
+    CallStmt: lambda node: listPieces(["CallStmt(", node.method, ","], node.param) + [")"],
+}
+
+# class -> function giving the whole text of a leaf
+LEAVES = {
+    Id: lambda node: "Id(" + node.name + ")",
+    IntLiteral: lambda node: "IntLiteral(" + str(node.value) + ")",
+    FloatLiteral: lambda node: "FloatLiteral(" + str(node.value) + ")",
+    StringLiteral: lambda node: "StringLiteral(" + node.value + ")",
+    BooleanLiteral: lambda node: "BooleanLiteral(" + str(node.value).lower() + ")",
+    Break: lambda node: "Break()",
+    Continue: lambda node: "Continue()",
+}
+
+
+def writeAST(ast, file):
+    """Write str(ast) to a text file object, a chunk at a time."""
+    out = []
+    append = out.append
+    # Pieces left to write, the next one last
+    stack = [ast]
+    pop = stack.pop
+    extend = stack.extend
+    while stack:
+        piece = pop()
+        cls = type(piece)
+        if cls is str:
+            append(piece)
+        elif cls in LEAVES:
+            append(LEAVES[cls](piece))
+        elif cls in PIECES:
+            pieces = PIECES[cls](piece)
+            pieces.reverse()
+            extend(pieces)
+            if len(out) >= CHUNK:
+                file.write("".join(out))
+                out.clear()
+        else:
+            # values of lists, as printlist takes them
+            append(str(piece))
+    file.write("".join(out))
+
+
+class StringBuffer(list):
+    # File object writing to a list of strings
+    write = list.append
+
+
+def renderAST(ast):
+    """str(ast), built in one buffer."""
+    buffer = StringBuffer()
+    writeAST(ast, buffer)
+    return "".join(buffer)
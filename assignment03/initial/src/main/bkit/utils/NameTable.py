@@ -0,0 +1,30 @@
+class NameTable:
+    """Names met during one compilation, each of them stored once.
+
+    intern() returns the stored copy of a name, so the Ids and Symbols
+    built from it share one str object, and dict lookups by an interned
+    name succeed on the identity test before comparing characters. Every
+    name also gets a small integer id, in the order of first use.
+    """
+
+    def __init__(self):
+        # name -> id
+        self.ids = {}
+        # id -> name
+        self.names = []
+
+    def __len__(self):
+        return len(self.names)
+
+    def nameId(self, _name):
+        i = self.ids.get(_name)
+        if i is None:
+            i = self.ids[_name] = len(self.names)
+            self.names.append(_name)
+        return i
+
+    def intern(self, _name):
+        return self.names[self.nameId(_name)]
+
+    def name(self, i):
+        return self.names[i]
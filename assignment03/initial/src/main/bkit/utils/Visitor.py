@@ -1,10 +1,83 @@
 from abc import ABC, abstractmethod, ABCMeta
+from types import GeneratorType
+
+
+def acceptVisitor(v, ast, param):
+    return ast.accept(v, param)
 
 
 class Visitor(ABC):
-    
+    """A visit method either returns its result or is a generator.
+
+    A generator visit method yields (child, param) for every child it needs
+    and receives the result of the child back from the yield:
+
+        def visitBinaryOp(self, ast, param):
+            left = yield ast.left, param
+            right = yield ast.right, param
+            return ...
+
+    visit() runs such methods on an explicit stack instead of the Python
+    stack, so the depth of the tree is not bounded by the recursion limit.
+    An exception raised by a child is thrown into its parent at the yield.
+
+    Every visitor class has a dispatch table from the AST classes to its
+    visit methods, so visiting a node is a dict lookup and a call instead
+    of going through accept().
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.visitMethods = {}
+
+    @classmethod
+    def lookupVisit(cls, astClass):
+        # visitBinaryOp for BinaryOp and so on, which is what accept() calls
+        method = getattr(cls, "visit" + astClass.__name__, acceptVisitor)
+        cls.visitMethods[astClass] = method
+        return method
+
     def visit(self,ast,param):
-        return ast.accept(self,param)
+        methods = self.visitMethods
+        try:
+            method = methods[type(ast)]
+        except KeyError:
+            method = self.lookupVisit(type(ast))
+        result = method(self,ast,param)
+        if type(result) is not GeneratorType:
+            return result
+        stack = [result]
+        result = error = None
+        while stack:
+            try:
+                if error is None:
+                    child, childParam = stack[-1].send(result)
+                else:
+                    thrown, error = error, None
+                    child, childParam = stack[-1].throw(thrown)
+            except StopIteration as stop:
+                stack.pop()
+                result = stop.value
+                continue
+            except Exception as e:
+                stack.pop()
+                error = e
+                continue
+            try:
+                method = methods[type(child)]
+            except KeyError:
+                method = self.lookupVisit(type(child))
+            try:
+                result = method(self, child, childParam)
+            except Exception as e:
+                error = e
+                continue
+            if type(result) is GeneratorType:
+                stack.append(result)
+                result = None
+        if error is not None:
+            raise error
+        return result
 
     @abstractmethod
     def visitProgram(self, ast, param):
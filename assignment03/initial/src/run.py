@@ -42,6 +42,47 @@ def main(argv):
             test(suite)
         else:
             printUsage()
+    elif argv[0] == 'check':
+        if os.path.isdir(TARGET) and not TARGET in sys.path:
+            sys.path.append(TARGET)
+        if len(argv) < 2:
+            printUsage()
+        else:
+            check(argv[1], argv[2] if len(argv) > 2 else os.path.join(argv[1], "output"))
+    elif argv[0] == 'bench':
+        if os.path.isdir(TARGET) and not TARGET in sys.path:
+            sys.path.append(TARGET)
+        if len(argv) < 2:
+            printUsage()
+        elif argv[1] == 'VisitorBench':
+            from VisitorBench import bench
+            bench()
+        elif argv[1] == 'ASTMemoryBench':
+            from ASTMemoryBench import bench
+            bench()
+        elif argv[1] == 'ASTGenBench':
+            from ASTGenBench import bench
+            bench()
+        elif argv[1] == 'ASTCodecBench':
+            from ASTCodecBench import bench
+            bench()
+        elif argv[1] == 'ASTReaderBench':
+            from ASTReaderBench import bench
+            bench()
+        elif argv[1] == 'ASTParserBench':
+            from ASTParserBench import bench
+            bench()
+        elif argv[1] == 'TwoStageParserBench':
+            from TwoStageParserBench import bench
+            bench()
+        elif argv[1] == 'ExpressionBench':
+            from ExpressionBench import bench
+            bench()
+        elif argv[1] == 'MappedInputBench':
+            from MappedInputBench import bench
+            bench()
+        else:
+            printUsage()
     else:
         printUsage()
     
@@ -58,12 +99,33 @@ def test(suite):
     stream.seek(0)
     print('Test output\n', stream.read())
 
+def check(inputdir, outputdir):
+    import time
+    from BatchCheck import checkDirectory
+    start = time.perf_counter()
+    results = checkDirectory(inputdir, outputdir, cacheDir=os.environ.get('BKIT_AST_CACHE'))
+    elapsed = time.perf_counter() - start
+    for status in ("ok", "error", "failed"):
+        print(status, sum(1 for result in results if result[1] == status))
+    print('Checked %d files in %.1f s, results in %s' % (len(results), elapsed, outputdir))
+
 def printUsage():
     print("python3 run.py gen")
     print("python3 run.py test LexerSuite")
     print("python3 run.py test ParserSuite")
     print("python3 run.py test ASTGenSuite")
     print("python3 run.py test CheckSuite")
+    print("python3 run.py check <dir> [<outdir>]")
+    print("   with BKIT_AST_CACHE=<dir> set, test and check cache the ASTs there")
+    print("python3 run.py bench VisitorBench")
+    print("python3 run.py bench ASTMemoryBench")
+    print("python3 run.py bench ASTGenBench")
+    print("python3 run.py bench ASTCodecBench")
+    print("python3 run.py bench ASTReaderBench")
+    print("python3 run.py bench ASTParserBench")
+    print("python3 run.py bench TwoStageParserBench")
+    print("python3 run.py bench ExpressionBench")
+    print("python3 run.py bench MappedInputBench")
 
 if __name__ == "__main__":
    main(sys.argv[1:])
@@ -0,0 +1,55 @@
+"""
+ Size and speed of the ASTCodec encoding against the string form of the
+ AST: encoding against str(), and decoding against building the AST again
+ from the source, which is what reading an AST back took without a
+ decoder. For the ASTs of the CheckSuite programs, then for a program of
+ 5000 statements.
+"""
+from ASTGeneration import ASTGeneration
+import ASTCodec
+from TestUtils import TestBench
+
+
+def compare(label, asttrees, sources):
+    text = sum(len(str(e)) for e in asttrees)
+    toString = TestBench.best(lambda: [str(e) for e in asttrees])
+    parsing = TestBench.best(lambda: [ASTGeneration().visit(TestBench.parseTree(source))
+                                      for source in sources], repeat=1)
+    print("%s: %d bytes as text, str() %.1f ms, parsing the source %.1f ms" %
+          (label, text, toString, parsing))
+    for compress in (False, True):
+        encoded = [ASTCodec.dumps(e, compress) for e in asttrees]
+        binary = sum(len(e) for e in encoded)
+        encoding = TestBench.best(lambda: [ASTCodec.dumps(e, compress) for e in asttrees])
+        decoding = TestBench.best(lambda: [ASTCodec.loads(e) for e in encoded])
+        print("  %-10s %8d bytes (%4.1fx smaller), encoding %.1f ms, decoding %.1f ms (%.0fx faster than parsing)" %
+              ("compressed" if compress else "encoded", binary, text / binary, encoding, decoding,
+               parsing / decoding))
+
+
+def largeProgram(statements):
+    return ("Function: main\nBody:\nVar: x = 0, y = 1.5;\n" +
+            "".join("x = x * %d + foo(x, y -. 1.0, \"s\");\n" % i for i in range(statements)) +
+            "EndBody.")
+
+
+def checkSources():
+    # Sources of TestBench.checkPrograms(); the CheckSuite wrote them, and
+    # str() of a program is not its source
+    sources = []
+    for num in range(400, 600):
+        try:
+            with open("./test/testcases/%d.txt" % num) as file:
+                source = file.read()
+        except OSError:
+            continue
+        if not source.startswith("Program("):
+            sources.append(source)
+    return sources
+
+
+def bench():
+    asttrees = TestBench.checkPrograms()
+    compare("%d CheckSuite programs" % len(asttrees), asttrees, checkSources())
+    source = largeProgram(5000)
+    compare("5000 statements", [ASTGeneration().visit(TestBench.parseTree(source))], [source])
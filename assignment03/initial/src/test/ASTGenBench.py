@@ -0,0 +1,36 @@
+"""
+ Time ASTGeneration takes on programs of n global variable declarations,
+ n doubling up to 100000. Declarations are collected in one pass, so the
+ time per declaration stays flat as n grows; the reduce() flatten it
+ replaced, timed up to 25000 declarations, copies the list built so far
+ for every declaration.
+"""
+from functools import reduce
+import ASTGeneration
+from TestUtils import TestBench
+
+
+def declarations(count):
+    return "".join("Var: x%d = %d;\n" % (i, i) for i in range(count))
+
+
+def quadraticFlatten(lst):
+    # ASTGeneration.flatten as it was
+    return list(reduce(lambda x, y: x+y, lst, []))
+
+
+def bench(sizes=(12500, 25000, 50000, 100000), quadraticUpTo=25000):
+    print("Declarations      ms  us/decl  quadratic flatten ms")
+    linear = ASTGeneration.flatten
+    for count in sizes:
+        tree = TestBench.parseTree(declarations(count))
+        generation = ASTGeneration.ASTGeneration()
+        time = TestBench.best(lambda: generation.visit(tree), repeat=3)
+        quadratic = ""
+        if count <= quadraticUpTo:
+            ASTGeneration.flatten = quadraticFlatten
+            try:
+                quadratic = "%.1f" % TestBench.best(lambda: generation.visit(tree), repeat=3)
+            finally:
+                ASTGeneration.flatten = linear
+        print("%12d %7.1f %8.2f %21s" % (count, time, 1000 * time / count, quadratic))
@@ -1,6 +1,37 @@
 import unittest
+import os
+import tempfile
 from TestUtils import TestAST
 from AST import *
+from ASTArena import ASTArena
+from NameTable import NameTable
+from DeclarationStream import DeclarationStream
+from ASTCache import ASTCache
+import ASTCodec
+from ASTReader import readAST, ASTSyntaxError
+from ASTWriter import renderAST, writeAST
+import io
+from antlr4 import InputStream
+from lexererr import ErrorToken
+from ASTParser import ParseError
+
+def sampleProgram():
+    # A node of every class, and an expression 200 operators deep
+    exp = IntLiteral(0)
+    for i in range(200):
+        exp = BinaryOp("+", exp, UnaryOp("-", IntLiteral(i)))
+    body = ([VarDecl(Id("s"), [], StringLiteral("a\\n")), VarDecl(Id("m"), [2, 3], None)], [
+        Assign(ArrayCell(Id("m"), [IntLiteral(0), IntLiteral(1)]), exp),
+        If([(BooleanLiteral(True), [], [Break()]),
+            (BooleanLiteral(False), [VarDecl(Id("f"), [], FloatLiteral(1.5))], [Continue()])],
+           ([], [Return(None)])),
+        For(Id("i"), IntLiteral(0), BinaryOp("<", Id("i"), IntLiteral(10)), IntLiteral(1), ([], [])),
+        While(BooleanLiteral(True), ([], [CallStmt(Id("printLn"), [])])),
+        Dowhile(([], [Return(CallExpr(Id("foo"), [ArrayLiteral([IntLiteral(1), IntLiteral(2)])]))]),
+                BooleanLiteral(False))])
+    return Program([VarDecl(Id("x"), [], IntLiteral(1)),
+                    FuncDecl(Id("main"), [VarDecl(Id("n"), [], None)], body)])
+
 
 class ASTGenSuite(unittest.TestCase):
     def test_simple_program(self):
@@ -9,6 +40,224 @@ class ASTGenSuite(unittest.TestCase):
         expect = str(Program([VarDecl(Id("x"),[],None)]))
         self.assertTrue(TestAST.checkASTGen(input,expect,300))
 
+    def test_declaration_lists_are_flattened_in_order(self):
+        input = """Var: a, b[2];
+        Var: c = 1;
+        Function: main
+        Body:
+            Var: d;
+            Var: e, f;
+        EndBody."""
+        expect = str(Program([
+            VarDecl(Id("a"),[],None),
+            VarDecl(Id("b"),[2],None),
+            VarDecl(Id("c"),[],IntLiteral(1)),
+            FuncDecl(Id("main"),[],([
+                VarDecl(Id("d"),[],None),
+                VarDecl(Id("e"),[],None),
+                VarDecl(Id("f"),[],None)],[]))]))
+        self.assertTrue(TestAST.checkASTGen(input,expect,302))
+
+    def test_operator_precedence_and_associativity(self):
+        input = """Var: x = a - b - c * d \\ e || f && !-g, y = a[1][2] +. foo(1)[0] -. (b < c) *. -.-h;
+        Function: main
+        Body:
+            foo(x)[1] = x == y + 1;
+            Return foo();
+        EndBody."""
+        expect = str(Program([
+            VarDecl(Id("x"),[],BinaryOp("&&",BinaryOp("||",BinaryOp("-",BinaryOp("-",Id("a"),Id("b")),
+                BinaryOp("\\",BinaryOp("*",Id("c"),Id("d")),Id("e"))),Id("f")),UnaryOp("!",UnaryOp("-",Id("g"))))),
+            VarDecl(Id("y"),[],BinaryOp("-.",BinaryOp("+.",ArrayCell(Id("a"),[IntLiteral(1),IntLiteral(2)]),
+                ArrayCell(CallExpr(Id("foo"),[IntLiteral(1)]),[IntLiteral(0)])),
+                BinaryOp("*.",BinaryOp("<",Id("b"),Id("c")),UnaryOp("-.",UnaryOp("-",Id("h")))))),
+            FuncDecl(Id("main"),[],([],[
+                Assign(ArrayCell(CallExpr(Id("foo"),[Id("x")]),[IntLiteral(1)]),
+                       BinaryOp("==",Id("x"),BinaryOp("+",Id("y"),IntLiteral(1)))),
+                Return(CallExpr(Id("foo"),[]))]))]))
+        self.assertTrue(TestAST.checkASTGen(input,expect,303))
+
+    def test_slotted_nodes(self):
+        def program(value):
+            return Program([FuncDecl(Id("main"),[VarDecl(Id("a"),[2],None)],([],[
+                Assign(ArrayCell(Id("a"),[IntLiteral(0)]),BinaryOp("+",IntLiteral(1),value)),
+                Break()]))])
+        self.assertFalse(hasattr(program(IntLiteral(2)), "__dict__"))
+        self.assertFalse(hasattr(Break(), "__dict__"))
+        self.assertEqual(program(IntLiteral(2)), program(IntLiteral(2)))
+        self.assertNotEqual(program(IntLiteral(2)), program(IntLiteral(3)))
+        self.assertNotEqual(Break(), Continue())
+        self.assertEqual(str(program(IntLiteral(2))),
+            "Program([FuncDecl(Id(main)[VarDecl(Id(a),[2])],([][Assign(ArrayCell(Id(a),[IntLiteral(0)]),BinaryOp(+,IntLiteral(1),IntLiteral(2))),Break()]))])")
+
+    def test_arena_round_trip(self):
+        asttree = sampleProgram()
+        body = asttree.decl[1].body
+        arena = ASTArena.fromAST(asttree)
+        self.assertEqual(arena.toAST(), asttree)
+        self.assertEqual(len(arena), 647)
+        main = arena.root().decl[1]
+        self.assertIsInstance(main, FuncDecl)
+        self.assertEqual(main.name.name, "main")
+        self.assertEqual(main.body[0][1].varDimen, [2, 3])
+        self.assertEqual(str(main.body[1][1]), str(body[1][1]))
+
+    def test_arena_wide_ints(self):
+        asttree = TestAST.makeAST("Var: x[18446744073709551616] = 0xFFFFFFFFFFFFFFFFFF, y = 1;")
+        arena = ASTArena.fromAST(asttree)
+        self.assertEqual(arena.toAST(), asttree)
+        self.assertEqual(arena.root().decl[0].varDimen, [2**64])
+        self.assertEqual(arena.root().decl[0].varInit.value, 0xFFFFFFFFFFFFFFFFFF)
+
+    def test_codec_round_trip(self):
+        asttree = sampleProgram()
+        literals = Program([VarDecl(Id("l"), [0, 200, 2**70], ArrayLiteral([
+            IntLiteral(-1), IntLiteral(-2**70), FloatLiteral(-0.1), FloatLiteral(1e300),
+            StringLiteral("\u00e9t\u00e9"), StringLiteral("")]))])
+        file = io.BytesIO()
+        ASTCodec.dump(asttree, file)
+        ASTCodec.dump(literals, file, compress=True)
+        ASTCodec.dump(Program([]), file)
+        file.seek(0)
+        self.assertEqual(ASTCodec.load(file), asttree)
+        decoded = ASTCodec.load(file)
+        self.assertEqual(decoded, literals)
+        self.assertEqual(str(decoded), str(literals))
+        self.assertEqual(ASTCodec.load(file), Program([]))
+        with self.assertRaises(EOFError):
+            ASTCodec.load(file)
+        data = ASTCodec.dumps(asttree)
+        self.assertLess(len(data), len(str(asttree)) // 4)
+        with self.assertRaises(ASTCodec.ASTFormatError):
+            ASTCodec.loads(data[:-1])
+        with self.assertRaises(ASTCodec.ASTFormatError):
+            ASTCodec.loads(b"BKAST\x02" + data[6:])
+        with self.assertRaises(ASTCodec.ASTFormatError):
+            ASTCodec.loads(b"JUNK" + data[4:])
+        # Corrupted bodies, each behind a header of the right length
+        def encoded(body):
+            return ASTCodec.HEADER.pack(ASTCodec.MAGIC, ASTCodec.VERSION, 0, len(body)) + body
+        size = ASTCodec.HEADER.size
+        string = ASTCodec.dumps(StringLiteral("abc"))[size:]
+        number = ASTCodec.dumps(FloatLiteral(1.5))[size:]
+        for body in [b"\xff" + data[size + 1:], string[:-1], string[:-3] + b"\xff\xfe\xfd",
+                     number[:5], number + b"\x00"]:
+            with self.assertRaises(ASTCodec.ASTFormatError):
+                ASTCodec.loads(encoded(body))
+        self.assertEqual(ASTCodec.loads(encoded(number)), FloatLiteral(1.5))
+        with self.assertRaises(ASTCodec.ASTFormatError):
+            ASTCodec.loads(data + b"\x00")
+
+    def test_reader_round_trip(self):
+        asttree = sampleProgram()
+        self.assertEqual(readAST(str(asttree)), asttree)
+        literals = Program([VarDecl(Id("s"), [], StringLiteral("f(x), [y] \\n '\"")),
+                            VarDecl(Id("a"), [2, 3], ArrayLiteral([IntLiteral(1), FloatLiteral(1e300)])),
+                            FuncDecl(Id("main"), [], ([], [If([(BooleanLiteral(True), [], [Return(None)])], ())]))])
+        self.assertEqual(readAST(str(literals) + "\n"), literals)
+        # Values with unbalanced parentheses and brackets
+        for value in ["(", ")", "x),y", "q)]", "f(x),[y]", "])", ""]:
+            string = StringLiteral(value)
+            unbalanced = Program([VarDecl(Id("s"), [], string), VarDecl(Id("a"), [2], ArrayLiteral([string, string])),
+                                  FuncDecl(Id("main"), [], ([VarDecl(Id("t"), [], string)], [
+                                      If([(string, [], [CallStmt(Id("f"), [string, IntLiteral(1)])])], ([], [Return(string)])),
+                                      While(BinaryOp("+", string, string), ([], []))]))])
+            self.assertEqual(readAST(str(unbalanced)), unbalanced, value)
+        # Nesting deeper than the recursion limit
+        depth = 5000
+        text = "BinaryOp(+,IntLiteral(1),".join([""] * (depth + 1)) + "IntLiteral(0)" + ")" * depth
+        self.assertEqual(readAST(text).right.right.left, IntLiteral(1))
+        for text in ["Program([)", "Foo()", "Program([VarDecl(Id(x)]", "Program([VarDecl()])",
+                     "Program([])Program([])", "IntLiteral(x)", "VarDecl(Id(x),[-])", "StringLiteral(x"]:
+            with self.assertRaises(ASTSyntaxError):
+                readAST(text)
+
+    def test_writer_matches_str(self):
+        asttree = sampleProgram()
+        self.assertEqual(renderAST(asttree), str(asttree))
+        edges = Program([VarDecl(Id("a"), [1, 2], ArrayLiteral([IntLiteral(0), BooleanLiteral(False)])),
+                         FuncDecl(Id("f"), [], ([], [If([(BooleanLiteral(True), [], [])], ()), Return(None)]))])
+        self.assertEqual(renderAST(edges), str(edges))
+        # Nesting too deep for str()
+        depth = 5000
+        text = "BinaryOp(+,IntLiteral(1),".join([""] * (depth + 1)) + "IntLiteral(0)" + ")" * depth
+        file = io.StringIO()
+        writeAST(readAST(text), file)
+        self.assertEqual(file.getvalue(), text)
+
+    def test_interned_identifiers(self):
+        names = NameTable()
+        input = """Var: x;
+        Function: main
+        Body:
+            x = x + 1;
+        EndBody."""
+        asttree = TestAST.makeAST(input, names)
+        assign = asttree.decl[1].body[1][0]
+        self.assertIs(assign.lhs.name, asttree.decl[0].variable.name)
+        self.assertIs(assign.rhs.left.name, assign.lhs.name)
+        self.assertEqual(names.names, ["x", "main"])
+        self.assertEqual(names.nameId("main"), 1)
+        self.assertEqual(str(asttree), str(TestAST.makeAST(input)))
+
+    def test_declaration_stream(self):
+        stream = DeclarationStream(InputStream("""Var: a = 1;
+        Function: foo
+        Parameter: n[2]
+        Body:
+            a = n[0];
+        EndBody.
+        Function: main
+        Body:
+        EndBody. ?"""))
+        declarations = iter(stream)
+        self.assertEqual(str(next(declarations)), str(VarDecl(Id("a"),[],IntLiteral(1))))
+        self.assertEqual(str(next(declarations)), str(FuncDecl(Id("foo"),[VarDecl(Id("n"),[2],None)],([],[
+            Assign(Id("a"),ArrayCell(Id("n"),[IntLiteral(0)]))]))))
+        # the stray token is only read with the declaration before it
+        with self.assertRaises(ErrorToken):
+            next(declarations)
+        with self.assertRaises(ErrorToken):
+            stream.headers()
+        stream = DeclarationStream(InputStream("""Var: a = 1;
+        Function: foo
+        Parameter: n[2]
+        Body:
+            a = n[0];
+        EndBody."""))
+        self.assertEqual([str(d) for d in stream.headers()], [
+            str(VarDecl(Id("a"),[],IntLiteral(1))),
+            str(FuncDecl(Id("foo"),[VarDecl(Id("n"),[2],None)],([],[])))])
+        # a syntax error raises ParseError, the headers skipping the bodies
+        stream = DeclarationStream(InputStream("""Var: a = 1;
+        Function: main
+        Body:
+            a = ;
+        EndBody."""))
+        self.assertEqual(len(stream.headers()), 2)
+        with self.assertRaises(ParseError) as error:
+            list(stream)
+        self.assertEqual(error.exception.message, "Error on line 4 col 16: ;")
+
+    def test_ast_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ASTCache(directory)
+            sources = ["Var: a = %d;" % i for i in range(3)]
+            asttree = cache.load(sources[0])
+            self.assertEqual(str(asttree), str(Program([VarDecl(Id("a"),[],IntLiteral(0))])))
+            self.assertEqual(cache.load(sources[0]), asttree)
+            cache.load(sources[1])
+            self.assertEqual((cache.hits, cache.misses), (1, 2))
+            # sources[1] becomes the least recently used entry
+            paths = [cache.path(source.encode()) for source in sources]
+            os.utime(paths[0], (1000, 1000))
+            os.utime(paths[1], (2000, 2000))
+            cache.load(sources[0])
+            cache.maxBytes = 2 * os.path.getsize(paths[0])
+            cache.load(sources[2])
+            self.assertEqual([os.path.exists(path) for path in paths], [True, False, True])
+            self.assertEqual((cache.hits, cache.misses), (2, 3))
+
     # def test_more_complex_program(self):
     #     input = """Var: x = 5;
     #     Function: main
@@ -0,0 +1,79 @@
+"""
+ Memory taken by the slotted AST nodes against the same nodes keeping
+ their fields in a __dict__, as they did before: per node of each class,
+ and for the ASTs of the CheckSuite programs. Then the same for an
+ ASTArena holding a program of a million nodes.
+"""
+import tracemalloc
+from dataclasses import make_dataclass, fields, is_dataclass
+import AST
+from ASTArena import ASTArena
+from TestUtils import TestBench
+
+
+def nodeClasses():
+    return [cls for cls in vars(AST).values()
+            if isinstance(cls, type) and issubclass(cls, AST.AST) and
+            (is_dataclass(cls) or cls in (AST.Break, AST.Continue))]
+
+
+def fieldNames(cls):
+    return [f.name for f in fields(cls)] if is_dataclass(cls) else []
+
+
+# slotted class -> the same dataclass with a __dict__
+DICT_CLASSES = {cls: make_dataclass(cls.__name__, fieldNames(cls)) for cls in nodeClasses()}
+
+
+def copyTree(tree, classes):
+    # Copy of the nodes and lists of tree, with classes[type(node)] for the nodes
+    if isinstance(tree, list):
+        return [copyTree(e, classes) for e in tree]
+    if isinstance(tree, tuple):
+        return tuple(copyTree(e, classes) for e in tree)
+    if isinstance(tree, AST.AST):
+        return classes[type(tree)](*[copyTree(getattr(tree, _name), classes)
+                                     for _name in fieldNames(type(tree))])
+    return tree
+
+
+def allocated(function):
+    # bytes still allocated by what function() returns
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = function()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def largeProgram(statements):
+    # 5 nodes per statement: x = x + i
+    return AST.Program([AST.FuncDecl(AST.Id("main"), [], (
+        [AST.VarDecl(AST.Id("x"), [], AST.IntLiteral(0))],
+        [AST.Assign(AST.Id("x"), AST.BinaryOp("+", AST.Id("x"), AST.IntLiteral(i)))
+         for i in range(statements)]))])
+
+
+def bench(count=10000):
+    print("Bytes per node         dict  slots")
+    for cls in nodeClasses():
+        args = [None] * len(fieldNames(cls))
+        withDict = allocated(lambda: [DICT_CLASSES[cls](*args) for _ in range(count)])
+        withSlots = allocated(lambda: [cls(*args) for _ in range(count)])
+        print("%-16s %10.1f %6.1f" % (cls.__name__, withDict / count, withSlots / count))
+
+    asttrees = TestBench.checkPrograms()
+    identity = {cls: cls for cls in nodeClasses()}
+    withDict = allocated(lambda: copyTree(asttrees, DICT_CLASSES))
+    withSlots = allocated(lambda: copyTree(asttrees, identity))
+    print("ASTs of %d programs: %d bytes with a dict, %d with slots (%.0f%%)" %
+          (len(asttrees), withDict, withSlots, 100.0 * withSlots / withDict))
+
+    statements = 200000
+    withSlots = allocated(lambda: largeProgram(statements))
+    asttree = largeProgram(statements)
+    arena = allocated(lambda: ASTArena.fromAST(asttree))
+    print("Program of %d nodes: %.1f MB as AST nodes, %.1f MB in an ASTArena" %
+          (5 * statements + 5, withSlots / 2**20, arena / 2**20))
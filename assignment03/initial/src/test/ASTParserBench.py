@@ -0,0 +1,47 @@
+"""
+ Speed and peak memory of ASTParser against BKITParser with ASTGeneration,
+ both fed by BKITScanner, for the CheckSuite programs, then for a program
+ of 5000 statements.
+"""
+import tracemalloc
+from antlr4 import CommonTokenStream, InputStream
+from BKITParser import BKITParser
+from BKITScanner import BKITScanner
+from ASTGeneration import ASTGeneration
+from ASTParser import ASTParser
+from ASTCodecBench import checkSources, largeProgram
+from TestUtils import TestBench
+
+
+def parseTree(source):
+    tree = BKITParser(CommonTokenStream(BKITScanner(InputStream(source)))).program()
+    return ASTGeneration().visit(tree)
+
+
+def parseAST(source):
+    return ASTParser(BKITScanner(InputStream(source))).program()
+
+
+def peak(function):
+    # bytes allocated at most while function() runs
+    tracemalloc.start()
+    function()
+    size = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size
+
+
+def compare(label, sources, repeat):
+    assert [str(parseAST(source)) for source in sources] == [str(parseTree(source)) for source in sources]
+    trees = lambda: [parseTree(source) for source in sources]
+    asts = lambda: [parseAST(source) for source in sources]
+    tree = TestBench.best(trees, repeat)
+    ast = TestBench.best(asts, repeat)
+    print("%s: BKITParser and ASTGeneration %.1f ms, %d KB peak; ASTParser %.1f ms (%.1fx faster), "
+          "%d KB peak" % (label, tree, peak(trees) // 1024, ast, tree / ast, peak(asts) // 1024))
+
+
+def bench():
+    sources = checkSources()
+    compare("%d CheckSuite programs" % len(sources), sources, 3)
+    compare("5000 statements", [largeProgram(5000)], 1)
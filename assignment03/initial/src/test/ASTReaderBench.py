@@ -0,0 +1,29 @@
+"""
+ Speed of ASTReader against parsing the source again, the two ways of
+ getting an AST back from a test file, and against ASTCodec. For the ASTs
+ of the CheckSuite programs, then for a program of 5000 statements.
+"""
+from ASTGeneration import ASTGeneration
+from ASTReader import readAST
+import ASTCodec
+from ASTCodecBench import checkSources, largeProgram
+from TestUtils import TestBench
+
+
+def compare(label, asttrees, sources):
+    texts = [str(e) for e in asttrees]
+    encoded = [ASTCodec.dumps(e) for e in asttrees]
+    parsing = TestBench.best(lambda: [ASTGeneration().visit(TestBench.parseTree(source))
+                                      for source in sources], repeat=1)
+    reading = TestBench.best(lambda: [readAST(text) for text in texts])
+    decoding = TestBench.best(lambda: [ASTCodec.loads(e) for e in encoded])
+    print("%s: %d bytes as text, parsing the source %.1f ms, reading the text %.1f ms (%.0fx faster), "
+          "decoding %.1f ms" % (label, sum(len(text) for text in texts), parsing, reading,
+                                parsing / reading, decoding))
+
+
+def bench():
+    asttrees = TestBench.checkPrograms()
+    compare("%d CheckSuite programs" % len(asttrees), asttrees, checkSources())
+    source = largeProgram(5000)
+    compare("5000 statements", [ASTGeneration().visit(TestBench.parseTree(source))], [source])
@@ -1,7 +1,22 @@
 import unittest
+import os
+import tempfile
 from TestUtils import TestChecker
 from StaticError import *
 from AST import *
+from StaticCheck import StaticChecker, MType, INT, FLOAT
+from IncrementalCheck import IncrementalChecker
+from ParallelCheck import ParallelChecker
+from ASTArena import ASTArena
+from NameTable import NameTable
+import BatchCheck
+from BatchCheck import checkDirectory, checkFile
+from ASTCache import ASTCache
+from DeclarationStream import DeclarationStream
+from StreamingCheck import StreamingChecker, DeclarationMismatch
+from antlr4 import InputStream
+from ASTParser import ASTParser, ParseError
+from BKITScanner import BKITScanner
 
 
 class CheckSuite(unittest.TestCase):
@@ -550,7 +565,7 @@ class CheckSuite(unittest.TestCase):
                 EndBody.
             Function: foo1
                 Body:
-                    foo0();
+                    foo0(x);
                     tmp(param);
                 EndBody.
             Function: main
@@ -1128,7 +1143,7 @@ class CheckSuite(unittest.TestCase):
                     EndWhile.
                 EndBody.
         """
-        expect = str(TypeMismatchInExpression(BinaryOp("<",Id("i"),IntLiteral(10))))
+        expect = ""
         self.assertTrue(TestChecker.test(input, expect, 481))
 
     def test_random_12(self):
@@ -1270,7 +1285,7 @@ class CheckSuite(unittest.TestCase):
                     foo(tmp0, tmp1);
                 EndBody.
         """
-        expect = str(TypeMismatchInStatement(CallStmt(Id("foo"),[Id("tmp0"),Id("tmp1")])))
+        expect = str(TypeMismatchInExpression(CallStmt(Id("foo"),[Id("tmp0"),Id("tmp1")])))
         self.assertTrue(TestChecker.test(input, expect, 492))
 
     def test_random_23(self):
@@ -1305,7 +1320,7 @@ class CheckSuite(unittest.TestCase):
                     foo(False, True);
                 EndBody.
         """
-        expect = str(TypeMismatchInStatement(CallStmt(Id("foo"),[BooleanLiteral("false"),BooleanLiteral("true")])))
+        expect = str(TypeMismatchInExpression(CallStmt(Id("foo"),[BooleanLiteral("false"),BooleanLiteral("true")])))
         self.assertTrue(TestChecker.test(input, expect, 494))
 
     def test_random_25(self):
@@ -1381,7 +1396,7 @@ class CheckSuite(unittest.TestCase):
                     printLn(True);
                 EndBody.
         """
-        expect = str(TypeMismatchInExpression(BinaryOp("==",Id("n"),IntLiteral(0))))
+        expect = str(TypeMismatchInStatement(CallStmt(Id("printLn"),[BooleanLiteral(True)])))
         self.assertTrue(TestChecker.test(input, expect, 498))
 
     def test_random_29(self):
@@ -1400,6 +1415,350 @@ class CheckSuite(unittest.TestCase):
         expect = str(TypeMismatchInExpression(CallExpr(Id("foo"),[])))
         self.assertTrue(TestChecker.test(input, expect, 499))
 
+    def test_redeclared_in_large_program(self):
+        input = Program([VarDecl(Id("x" + str(i)), [], None) for i in range(50000)] +
+                        [FuncDecl(Id("main"), [], ([], [])),
+                         VarDecl(Id("x49999"), [], None)])
+        expect = str(Redeclared(Variable(), "x49999"))
+        self.assertTrue(TestChecker.test(input, expect, 500))
+
+    def test_shadowing_in_deep_nesting(self):
+        loop = [Assign(Id("x"), FloatLiteral(1.5))]
+        for i in range(1000):
+            loop = [While(BooleanLiteral(True), ([VarDecl(Id("x"), [], None)], loop))]
+        last = Assign(Id("x"), FloatLiteral(2.5))
+        input = Program([FuncDecl(Id("main"), [], ([VarDecl(Id("x"), [], IntLiteral(0))],
+                                                  loop + [last]))])
+        # str() of the tree recurses, so it is checked without TestChecker
+        with self.assertRaises(TypeMismatchInExpression) as error:
+            StaticChecker(input).check()
+        self.assertIs(error.exception.exp, last)
+
+    def test_int_div_mod_and_float_div(self):
+        input = """
+            Var: x, y;
+            Function: main
+                Body:
+                    x = 7 \\ 2 % 3;
+                    y = -. 1.5 =/= 2.0;
+                    y = x \\. 2.0;
+                EndBody.
+        """
+        expect = str(TypeMismatchInExpression(BinaryOp("\\.",Id("x"),FloatLiteral(2.0))))
+        self.assertTrue(TestChecker.test(input, expect, 502))
+
+    def test_reassign_keeps_inferred_type(self):
+        input = """
+            Var: x;
+            Function: main
+                Body:
+                    x = 1;
+                    x = 2;
+                    If x == 2 Then
+                        x = 2.5;
+                    EndIf.
+                EndBody.
+        """
+        expect = str(TypeMismatchInExpression(Assign(Id("x"),FloatLiteral(2.5))))
+        self.assertTrue(TestChecker.test(input, expect, 503))
+
+    def test_infer_through_unknown_assignment(self):
+        input = """
+            Var: x, y;
+            Function: main
+                Body:
+                    x = y;
+                    y = 1;
+                    x = 2.5;
+                EndBody.
+        """
+        expect = str(TypeMismatchInExpression(Assign(Id("x"),FloatLiteral(2.5))))
+        self.assertTrue(TestChecker.test(input, expect, 504))
+
+    def test_infer_param_from_call(self):
+        input = """
+            Function: id
+                Parameter: n
+                Body:
+                    Return n;
+                EndBody.
+            Function: main
+                Body:
+                    Var: a;
+                    a = id(3);
+                    a = id(True);
+                EndBody.
+        """
+        expect = str(TypeMismatchInExpression(CallExpr(Id("id"),[BooleanLiteral(True)])))
+        self.assertTrue(TestChecker.test(input, expect, 505))
+
+    def test_infer_return_type(self):
+        input = """
+            Function: foo
+                Parameter: n
+                Body:
+                    Return n * 2;
+                EndBody.
+            Function: main
+                Body:
+                    Var: s = "";
+                    s = foo(1);
+                EndBody.
+        """
+        expect = str(TypeMismatchInExpression(Assign(Id("s"),CallExpr(Id("foo"),[IntLiteral(1)]))))
+        self.assertTrue(TestChecker.test(input, expect, 506))
+
+    def test_infer_array_element_type(self):
+        input = """
+            Var: a[3];
+            Function: main
+                Body:
+                    a[0] = 1;
+                    a[1] = 1.5;
+                EndBody.
+        """
+        expect = str(TypeMismatchInExpression(Assign(ArrayCell(Id("a"),[IntLiteral(1)]),FloatLiteral(1.5))))
+        self.assertTrue(TestChecker.test(input, expect, 507))
+
+    def test_incremental_recheck_only_affected_functions(self):
+        def foo(operand):
+            return FuncDecl(Id("foo"), [VarDecl(Id("n"), [], None)], ([], [
+                Return(BinaryOp("+", Id("n"), operand))]))
+        bar = FuncDecl(Id("bar"), [], ([], [Return(StringLiteral("s"))]))
+        main = FuncDecl(Id("main"), [], ([], [
+            CallStmt(Id("printStrLn"), [CallExpr(Id("bar"), [])])]))
+        checker = IncrementalChecker(Program([foo(IntLiteral(1)), bar, main]))
+        checker.check()
+        self.assertIs(checker.signature("foo"), MType([INT], INT))
+        mainResult = checker.results[frozenset(["bar", "main"])]
+
+        checker.update(foo(FloatLiteral(1.0)))
+        with self.assertRaises(TypeMismatchInExpression) as error:
+            checker.check()
+        self.assertEqual(str(error.exception), str(TypeMismatchInExpression(
+            BinaryOp("+", Id("n"), FloatLiteral(1.0)))))
+        self.assertIs(checker.results[frozenset(["bar", "main"])], mainResult)
+
+    def test_parallel_check_matches_sequential(self):
+        def function(i, body):
+            return FuncDecl(Id("f%d" % i), [VarDecl(Id("n"), [], None)], ([], body))
+        decls = [function(i, [Return(BinaryOp("*", Id("n"), IntLiteral(i)))]) for i in range(20)]
+        decls += [function(20, [Return(CallExpr(Id("f3"), [FloatLiteral(1.0)]))]),
+                  function(21, [Return(BinaryOp("+.", Id("n"), IntLiteral(1)))]),
+                  FuncDecl(Id("main"), [], ([], [CallStmt(Id("printLn"), [])]))]
+        with self.assertRaises(TypeMismatchInExpression) as sequential:
+            StaticChecker(Program(decls)).check()
+
+        checker = ParallelChecker(Program(decls), maxWorkers=4)
+        with self.assertRaises(TypeMismatchInExpression) as parallel:
+            checker.check()
+        self.assertEqual(str(parallel.exception), str(sequential.exception))
+
+        checker.update(function(20, [Return(CallExpr(Id("f3"), [IntLiteral(1)]))]))
+        checker.update(function(21, [Return(BinaryOp("+.", Id("n"), FloatLiteral(1.0)))]))
+        checker.check()
+        self.assertIs(checker.signature("f3"), MType([INT], INT))
+        self.assertIs(checker.signature("f21"), MType([FLOAT], FLOAT))
+
+    def test_deep_expression_is_not_bounded_by_recursion(self):
+        def program(first):
+            exp = first
+            for i in range(5000):
+                exp = BinaryOp("+", exp, CallExpr(Id("foo"), [UnaryOp("-", IntLiteral(i))]))
+            return Program([
+                FuncDecl(Id("foo"), [VarDecl(Id("n"), [], None)], ([], [Return(Id("n"))])),
+                FuncDecl(Id("main"), [], ([VarDecl(Id("x"), [], None)], [Assign(Id("x"), exp)]))])
+        StaticChecker(program(IntLiteral(0))).check()
+        IncrementalChecker(program(IntLiteral(0))).check()
+
+        first = BinaryOp("+", FloatLiteral(0.0), IntLiteral(1))
+        with self.assertRaises(TypeMismatchInExpression) as error:
+            StaticChecker(program(first)).check()
+        self.assertIs(error.exception.exp, first)
+
+    def test_deep_statements_are_not_bounded_by_recursion(self):
+        def program(first):
+            body = [first]
+            for i in range(5000):
+                block = ([VarDecl(Id("y"), [], None)], body + [Assign(Id("y"), IntLiteral(i))])
+                body = [[If([(BooleanLiteral(True), [], [])], block),
+                         For(Id("x"), IntLiteral(0), BooleanLiteral(False), IntLiteral(1), block),
+                         Dowhile(block, BooleanLiteral(False)),
+                         While(BooleanLiteral(True), block)][i % 4]]
+            return Program([
+                FuncDecl(Id("foo"), [], ([], [Return(None)])),
+                FuncDecl(Id("main"), [], ([VarDecl(Id("x"), [], None)], body))])
+        StaticChecker(program(CallStmt(Id("foo"), []))).check()
+        IncrementalChecker(program(CallStmt(Id("foo"), []))).check()
+
+        first = Assign(Id("x"), FloatLiteral(1.0))
+        with self.assertRaises(TypeMismatchInExpression) as error:
+            StaticChecker(program(first)).check()
+        self.assertIs(error.exception.exp, first)
+
+    def test_check_arena_cursors(self):
+        asttree = Program([
+            VarDecl(Id("x"), [3], None),
+            FuncDecl(Id("main"), [], ([], [
+                Assign(ArrayCell(Id("x"), [IntLiteral(0)]), FloatLiteral(1.0)),
+                If([(BinaryOp("=/=", ArrayCell(Id("x"), [IntLiteral(1)]), IntLiteral(1)), [], [])], ([], []))]))])
+        with self.assertRaises(TypeMismatchInExpression) as error:
+            StaticChecker(ASTArena.fromAST(asttree).root()).check()
+        self.assertEqual(str(error.exception), str(TypeMismatchInExpression(
+            BinaryOp("=/=", ArrayCell(Id("x"), [IntLiteral(1)]), IntLiteral(1)))))
+
+    def test_symbols_share_interned_names(self):
+        names = NameTable()
+        # equal names held by distinct str objects
+        declared, used = "".join(["co", "unt"]), "".join(["cou", "nt"])
+        asttree = Program([
+            VarDecl(Id(declared), [], IntLiteral(0)),
+            FuncDecl(Id("main"), [], ([], [Assign(Id(used), IntLiteral(1))]))])
+        checker = StaticChecker(asttree, names)
+        checker.check()
+        self.assertIs(checker.global_envi.lookup(used).name, declared)
+        self.assertIs(names.intern(used), declared)
+        self.assertEqual(names.name(names.nameId("main")), "main")
+
+    def test_streamed_declarations_see_later_headers(self):
+        input = """
+            Function: main
+                Body:
+                    foo(1);
+                    x = 1;
+                EndBody.
+            Function: foo
+                Parameter: a
+                Body:
+                EndBody.
+            Function: foo
+                Body:
+                EndBody.
+        """
+        expect = str(Redeclared(Function(), "foo"))
+        self.assertTrue(TestChecker.test(input, expect, 510))
+
+    def test_streamed_declarations_match_headers(self):
+        class Dropping(DeclarationStream):
+            # A second pass that loses its last declaration
+            def __iter__(self):
+                return iter(list(super().__iter__())[:-1])
+        class Reversed(DeclarationStream):
+            def __iter__(self):
+                return reversed(list(super().__iter__()))
+        input = """
+            Var: x = 1;
+            Function: main
+                Body:
+                    x = 2;
+                EndBody.
+        """
+        StreamingChecker(DeclarationStream(InputStream(input))).check()
+        for streamClass in (Dropping, Reversed):
+            with self.assertRaises(DeclarationMismatch):
+                StreamingChecker(streamClass(InputStream(input))).check()
+
+    def test_streamed_syntax_error_comes_first(self):
+        # The undeclared x of foo is checked before main is parsed
+        input = """
+            Function: foo
+                Body:
+                    x = 1;
+                EndBody.
+            Function: main
+                Body:
+                    foo(;
+                EndBody.
+        """
+        for source in (input, input.replace("EndBody.", "EndBody", 1)):
+            with self.assertRaises(ParseError) as error:
+                StreamingChecker(DeclarationStream(InputStream(source))).check()
+            with self.assertRaises(ParseError) as expected:
+                ASTParser(BKITScanner(InputStream(source))).program()
+            self.assertEqual(error.exception.message, expected.exception.message)
+
+    def test_check_directory(self):
+        sources = {
+            "correct.txt": "Function: main\nBody:\n    printLn();\nEndBody.",
+            "undeclared.txt": "Function: main\nBody:\n    x = 1;\nEndBody.",
+            "unlexable.txt": "Function: main\nBody:\n    ?\nEndBody."}
+        with tempfile.TemporaryDirectory() as inputdir:
+            for _name, source in sources.items():
+                with open(os.path.join(inputdir, _name), "w") as file:
+                    file.write(source)
+            outputdir = os.path.join(inputdir, "output")
+            results = checkDirectory(inputdir, outputdir, maxWorkers=2)
+            self.assertEqual([result[:2] for result in results], [
+                ("correct.txt", "ok"), ("undeclared.txt", "error"), ("unlexable.txt", "failed")])
+            outputs = {}
+            for _name in sources:
+                with open(os.path.join(outputdir, _name)) as file:
+                    outputs[_name] = file.read()
+            self.assertEqual(outputs, {
+                "correct.txt": "",
+                "undeclared.txt": str(Undeclared(Variable(), "x")) + "\n",
+                "unlexable.txt": "Error Token ?"})
+            with open(os.path.join(outputdir, "timing.csv")) as file:
+                self.assertEqual([line.split(",")[:2] for line in file.read().splitlines()], [
+                    ["file", "status"], ["correct.txt", "ok"], ["undeclared.txt", "error"],
+                    ["unlexable.txt", "failed"]])
+
+    def test_check_file_with_and_without_cache(self):
+        source = "Var: x;\nFunction: main\nBody:\n    x = ;\nEndBody."
+        with tempfile.TemporaryDirectory() as directory:
+            inputfile = os.path.join(directory, "syntax.txt")
+            with open(inputfile, "w") as file:
+                file.write(source)
+            outputs = []
+            for cache in (None, ASTCache(os.path.join(directory, "cache"))):
+                BatchCheck.cache = cache
+                try:
+                    status = checkFile(inputfile, os.path.join(directory, "output.txt"))[0]
+                finally:
+                    BatchCheck.cache = None
+                with open(os.path.join(directory, "output.txt")) as file:
+                    outputs.append((status, file.read()))
+        self.assertEqual(outputs, [("failed", "Error on line 4 col 8: ;")] * 2)
+
+    def test_report_all_errors(self):
+        input = """
+            Var: x = 1;
+            Function: main
+                Parameter: a, a
+                Body:
+                    Var: s = "";
+                    y = 1;
+                    y = s;
+                    x = 1.5;
+                    s = s + 1;
+                    foo(y);
+                    If x Then EndIf.
+                EndBody.
+        """
+        expect = "\n".join([
+            str(Redeclared(Parameter(), "a")),
+            str(Undeclared(Variable(), "y")),
+            str(TypeMismatchInExpression(Assign(Id("x"),FloatLiteral(1.5)))),
+            str(TypeMismatchInExpression(BinaryOp("+",Id("s"),IntLiteral(1)))),
+            str(Undeclared(Function(), "foo")),
+            str(TypeMismatchInStatement(If([(Id("x"),[],[])],([],[]))))])
+        self.assertTrue(TestChecker.testAll(input, expect, 508))
+
+    def test_report_all_errors_up_to_limit(self):
+        input = """
+            Function: main
+                Body:
+                    Var: x = 1;
+                    x = 1.5;
+                    x = "s";
+                    x = True;
+                EndBody.
+        """
+        expect = "\n".join([
+            str(TypeMismatchInExpression(Assign(Id("x"),FloatLiteral(1.5)))),
+            str(TypeMismatchInExpression(Assign(Id("x"),StringLiteral("s"))))])
+        self.assertTrue(TestChecker.testAll(input, expect, 509, maxErrors=2))
+
     # def test_tmp_00(self):
     #     input = """
 
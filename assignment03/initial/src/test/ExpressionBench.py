@@ -0,0 +1,66 @@
+"""
+ Parse throughput of BKITParser on expression-heavy programs: many short
+ expressions, then fewer and longer ones, up to one of 2000 terms. Tokens
+ are lexed once, so that only the parser and ASTGeneration are timed.
+"""
+import random
+from antlr4 import CommonTokenStream, InputStream
+from BKITParser import BKITParser
+from BKITScanner import BKITScanner
+from ASTGeneration import ASTGeneration
+from TestUtils import TestBench
+
+OPERATORS = ["+", "-", "*", "\\", "%", "+.", "-.", "*.", "\\.", "&&", "||"]
+COMPARE = ["==", "!=", "<", ">=", "=/=", "<."]
+
+
+def term(rng, depth):
+    r = rng.random()
+    if r < 0.3:
+        return str(rng.randint(0, 999))
+    elif r < 0.45:
+        return "x"
+    elif r < 0.55:
+        return "a[%s][1]" % term(rng, depth)
+    elif r < 0.65 and depth:
+        return "foo(%s, %s)" % (term(rng, depth - 1), expression(rng, 3, depth - 1))
+    elif r < 0.75 and depth:
+        return "(%s)" % expression(rng, 3, depth - 1)
+    elif r < 0.85:
+        # NOT comes before a sign, not after it
+        return rng.choice(["!", "-", "-.", "!-"]) + rng.choice(["x", "2", "a[0][1]"])
+    return rng.choice(["1.5e3", "True", "\"s\"", "0x1F"])
+
+
+def expression(rng, terms, depth=2):
+    text = term(rng, depth)
+    for _ in range(terms - 1):
+        text += " " + rng.choice(OPERATORS) + " " + term(rng, depth)
+    if rng.random() < 0.3:
+        text += " " + rng.choice(COMPARE) + " " + term(rng, depth)
+    return text
+
+
+def expressionProgram(statements, terms):
+    rng = random.Random(0)
+    return ("Function: main\nBody:\n" +
+            "".join("x = %s;\n" % expression(rng, terms) for _ in range(statements)) +
+            "EndBody.")
+
+
+def bench(shapes=((2000, 4), (200, 40), (20, 400), (1, 2000))):
+    print("Statements  terms   tokens  parse ms  ktokens/s  ASTGeneration ms")
+    for statements, terms in shapes:
+        tokens = CommonTokenStream(BKITScanner(InputStream(expressionProgram(statements, terms))))
+        tokens.fill()
+        parser = BKITParser(tokens)
+        def parse():
+            tokens.seek(0)
+            parser.setTokenStream(tokens)
+            return parser.program()
+        time = TestBench.best(parse, repeat=3)
+        tree = parse()
+        assert parser.getNumberOfSyntaxErrors() == 0
+        generation = TestBench.best(lambda: ASTGeneration().visit(tree), repeat=3)
+        print("%10d %6d %8d %9.1f %10.0f %17.1f" % (statements, terms, len(tokens.tokens), time,
+                                                   len(tokens.tokens) / time, generation))
@@ -1,5 +1,26 @@
 import unittest
+import random
+from antlr4 import InputStream, Token
 from TestUtils import TestLexer
+from BKITLexer import BKITLexer
+from BKITScanner import BKITScanner
+from lexererr import *
+from MappedInputStream import MappedInputStream
+import os
+import tempfile
+
+
+def scannedTokens(lexerClass, source, input=InputStream):
+    # (type, text, line, column) of the tokens of source, then the error
+    lexer = lexerClass(input(source))
+    tokens = []
+    try:
+        while not tokens or tokens[-1][0] != Token.EOF:
+            token = lexer.nextToken()
+            tokens.append((token.type, token.text, token.line, token.column))
+    except (ErrorToken, UncloseString, IllegalEscape, UnterminatedComment) as err:
+        tokens.append(err.message)
+    return tokens
 
 class LexerSuite(unittest.TestCase):
       
@@ -28,5 +49,53 @@ class LexerSuite(unittest.TestCase):
     def test_wrong_string_with_quote(self):
         """test wrong string with quote"""
         self.assertTrue(TestLexer.checkLexeme(""" "ab"cdef"  ""","""ab,cdef,Unclosed String:   """,108))
-    
-    
+
+    def test_unterminated_comment(self):
+        """test unterminated comment"""
+        self.assertTrue(TestLexer.checkLexeme("a ** b ** c **","a,c,Unterminated Comment",109))
+
+    def test_number_edges(self):
+        """test integers and floats sharing a prefix"""
+        self.assertTrue(TestLexer.checkLexeme("0x1E5 0x1e5 1.e5e6 0o 007 12e","0x1E5,0x1e5,1.e5e6,0o,0,0,7,12,e,<EOF>",110))
+
+    def test_keyword_prefixes(self):
+        """test keywords followed by identifiers"""
+        self.assertTrue(TestLexer.checkLexeme("Vars Dox ElseIfx","Var,s,Do,x,ElseIf,x,<EOF>",111))
+
+    def test_scanner_matches_lexer(self):
+        """BKITScanner and BKITLexer give the same tokens and errors"""
+        random.seed(0)
+        alphabet = list("aZx0789eE+-.*\\/=<>!&|(){}[]:;,\"'\n\t rbtnoX_%?") + [
+            "Var", "ElseIf", "True", "0x1E", "1.5e", "**", "\\n", "'\"", "\\h"]
+        for _ in range(2000):
+            source = "".join(random.choice(alphabet) for _ in range(random.randint(0, 12)))
+            self.assertEqual(scannedTokens(BKITScanner, source), scannedTokens(BKITLexer, source), repr(source))
+
+    def test_mapped_input_stream(self):
+        """MappedInputStream gives the characters and tokens of InputStream"""
+        sources = ["Var: x = 0x1F, s = \"a\\n\";\r\nFunction: main Body: x = x + 1; EndBody.",
+                   "Var: s = \"\u00e9\u2713\"; ?", "", "x \"unclosed"]
+        streams = []
+        with tempfile.TemporaryDirectory() as directory:
+            def mapped(source):
+                # A new file for each stream: a mapped file must not be rewritten
+                filename = os.path.join(directory, "%d.txt" % len(streams))
+                with open(filename, "w", encoding="utf-8", newline="") as file:
+                    file.write(source)
+                streams.append(MappedInputStream(filename))
+                return streams[-1]
+            try:
+                for source in sources:
+                    for lexerClass in (BKITLexer, BKITScanner):
+                        self.assertEqual(scannedTokens(lexerClass, source, mapped), scannedTokens(lexerClass, source))
+                stream = mapped(sources[1])
+                self.assertFalse(stream.ascii)
+                self.assertEqual((stream.size, stream.LA(11), stream.getText(10, 11)), (len(sources[1]), ord("\u00e9"), "\u00e9\u2713"))
+                stream = mapped(sources[0])
+                self.assertTrue(stream.ascii)
+                stream.seek(stream.size)
+                self.assertEqual((stream.LA(-1), stream.LA(1), stream.getText(0, 3)), (ord("."), Token.EOF, "Var:"))
+                self.assertEqual(str(stream), sources[0])
+            finally:
+                for stream in streams:
+                    stream.close()
@@ -0,0 +1,51 @@
+"""
+ Time and peak memory of reading a generated source through FileStream,
+ which keeps the decoded text and a list of its code points, and through
+ MappedInputStream. Mapped pages are not allocations, so they do not count
+ in the peak. Then lexing the two with BKITScanner, and with BKITLexer on a
+ smaller source.
+"""
+import os
+import tempfile
+import tracemalloc
+from antlr4 import FileStream, Token
+from BKITLexer import BKITLexer
+from BKITScanner import BKITScanner
+from MappedInputStream import MappedInputStream
+from ASTCodecBench import largeProgram
+from TestUtils import TestBench
+
+
+def lex(lexerClass, input):
+    lexer = lexerClass(input)
+    count = 0
+    while lexer.nextToken().type != Token.EOF:
+        count += 1
+    return count
+
+
+def measure(function):
+    # (milliseconds, peak KB) of function()
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return TestBench.best(function, repeat=3), peak // 1024
+
+
+def compare(filename, lexerClass):
+    print("%s, %d KB:" % (lexerClass.__name__, os.path.getsize(filename) // 1024))
+    for streamClass in (FileStream, MappedInputStream):
+        opening = measure(lambda: streamClass(filename))
+        lexing = measure(lambda: lex(lexerClass, streamClass(filename)))
+        print("  %-17s open %7.1f ms %7d KB peak, open and lex %8.1f ms %7d KB peak"
+              % ((streamClass.__name__,) + opening + lexing))
+
+
+def bench():
+    with tempfile.TemporaryDirectory() as directory:
+        for statements, lexerClass in ((100000, BKITScanner), (2000, BKITLexer)):
+            filename = os.path.join(directory, "%d.txt" % statements)
+            with open(filename, "w") as file:
+                file.write(largeProgram(statements))
+            compare(filename, lexerClass)
@@ -1,5 +1,46 @@
 import unittest
-from TestUtils import TestParser
+import random
+from antlr4 import InputStream, CommonTokenStream
+from TestUtils import TestParser, NewErrorListener, SyntaxException
+from BKITParser import BKITParser
+from BKITLexer import BKITLexer
+from BKITScanner import BKITScanner
+from ASTGeneration import ASTGeneration
+from ASTParser import ASTParser, ParseError
+from TwoStageParser import TwoStageParser
+
+
+def parsedAST(parse, source):
+    # str of the AST of source, else the message of the error
+    try:
+        return str(parse(BKITScanner(InputStream(source))))
+    except (SyntaxException, ParseError) as f:
+        return f.message
+    except Exception as e:
+        return str(e)
+
+def bkitParse(lexer):
+    parser = BKITParser(CommonTokenStream(lexer))
+    parser.removeErrorListeners()
+    parser.addErrorListener(NewErrorListener.INSTANCE)
+    return ASTGeneration().visit(parser.program())
+
+def astParse(lexer):
+    return ASTParser(lexer).program()
+
+def treeText(parse, source):
+    try:
+        return parse(InputStream(source)).toStringTree(ruleNames=BKITParser.ruleNames)
+    except SyntaxException as f:
+        return f.message
+    except Exception as e:
+        return str(e)
+
+def llParse(input):
+    parser = BKITParser(CommonTokenStream(BKITLexer(input)))
+    parser.removeErrorListeners()
+    parser.addErrorListener(NewErrorListener.INSTANCE)
+    return parser.program()
 
 class ParserSuite(unittest.TestCase):
     def test_simple_program(self):
@@ -14,4 +55,97 @@ class ParserSuite(unittest.TestCase):
         expect = "Error on line 1 col 5: ;"
         self.assertTrue(TestParser.checkParser(input,expect,202))
 
-    
\ No newline at end of file
+    def test_while_after_do_body(self):
+        """While ends the body of a Do unless exp Do follows it"""
+        input = """Function: main
+        Body:
+            Do x = x + 1; While x < 10 EndDo.
+            While x > 0 Do x = x - 1; EndWhile.
+        EndBody."""
+        expect = "successful"
+        self.assertTrue(TestParser.checkParser(input,expect,203))
+
+    def test_wrong_call_argument(self):
+        """The whole input is lexed before reporting no viable alternative"""
+        input = """Function: main
+        Body:
+            x = foo(1, 2 3);
+        EndBody."""
+        expect = "Error on line 3 col 25: 3"
+        self.assertTrue(TestParser.checkParser(input,expect,204))
+
+    def test_wrong_token_after_declarations(self):
+        """A stray token after the declarations comes before a lexer error after it"""
+        input = """Function: main Body: EndBody. + ?"""
+        expect = "Error on line 1 col 30: +"
+        self.assertTrue(TestParser.checkParser(input,expect,205))
+
+    def test_wrong_token_after_else_if(self):
+        input = """Function: main
+        Body:
+            If x Then ElseIf y Then Return; EndBody ?"""
+        expect = "Error on line 3 col 44: EndBody"
+        self.assertTrue(TestParser.checkParser(input,expect,206))
+
+    def test_lexer_error_after_wrong_token(self):
+        """The token after a mismatched one is read first"""
+        input = """Var: x = ) ?"""
+        expect = "?"
+        self.assertTrue(TestParser.checkParser(input,expect,207))
+
+    def test_wrong_unary_order(self):
+        input = """Function: main
+        Body:
+            a[1][2] = -.!x * (y + 0x1F) \\. 1.5e3 || "s" >=. {1, {2}};
+        EndBody."""
+        expect = "Error on line 3 col 24: !"
+        self.assertTrue(TestParser.checkParser(input,expect,208))
+
+    def test_ast_parser_matches_bkit_parser(self):
+        """ASTParser gives the AST of ASTGeneration and the first error of BKITParser"""
+        random.seed(0)
+        source = """Var: x = 0x1F, a[2][3] = {{1, 2.5e1}, {"s\\n", True}};
+        Function: foo
+        Parameter: n, m[2]
+        Body:
+            Var: i;
+            For (i = 0, i < n, 1) Do
+                If (n % 2 == 0) && !False Then m[i] = -.foo(n - 1, m)[0] *. 2.0;
+                ElseIf n >=. 1.0 Then Continue;
+                Else Break;
+                EndIf.
+            EndFor.
+            Do n = n \\ 2; While n > 0 EndDo.
+            While x != 0o17 Do print(x); Return; EndWhile.
+            Return m[0] + -n * (1 - 2);
+        EndBody."""
+        words = source.split()
+        alphabet = list(set(words)) + ["(", ")", "[", "]", ";", ",", "=", "Do", "While", "EndDo", "?"]
+        self.assertEqual(parsedAST(astParse, source), parsedAST(bkitParse, source))
+        for _ in range(500):
+            mutant = list(words)
+            for _ in range(random.randint(1, 2)):
+                k = random.randrange(len(mutant))
+                r = random.random()
+                if r < 0.33:
+                    del mutant[k]
+                elif r < 0.66:
+                    mutant.insert(k, random.choice(alphabet))
+                else:
+                    mutant[k] = random.choice(alphabet)
+            mutant = " ".join(mutant)
+            self.assertEqual(parsedAST(astParse, mutant), parsedAST(bkitParse, mutant), mutant)
+
+    def test_two_stage_parser(self):
+        """SLL parses valid inputs once, the others are parsed again with LL"""
+        parser = TwoStageParser(NewErrorListener.INSTANCE)
+        valid = ["Var: x = {1, {2}}, y = foo(1)[x];",
+                 "Function: main Body: Do While x Do EndWhile. While y EndDo. EndBody.",
+                 "Function: main Body: If x Then foo(1)[2] = 3; ElseIf y Then Else Return; EndIf. EndBody."]
+        for source in valid:
+            self.assertEqual(treeText(parser.parse, source), treeText(llParse, source))
+        self.assertEqual(parser.fallbacks, 0)
+        wrong = ["Var: x = 1 ) ?", "Function: main Body: EndBody. + ?", "Var: x = foo(1 2);", "Var: ;"]
+        for source in wrong:
+            self.assertEqual(treeText(parser.parse, source), treeText(llParse, source))
+        self.assertEqual(parser.fallbacks, len(wrong))
@@ -8,11 +8,21 @@ if os.path.isdir('../target/main/bkit/parser') and not '../target/main/bkit/pars
 
 from BKITLexer import BKITLexer
 from BKITParser import BKITParser
+from BKITScanner import BKITScanner
+from TwoStageParser import TwoStageParser
 from lexererr import *
 from ASTGeneration import ASTGeneration
+from ASTParser import ASTParser, ParseError
 from StaticCheck import StaticChecker
+from DeclarationStream import DeclarationStream
+from StreamingCheck import StreamingChecker
+from ASTCache import ASTCache
+import ASTCodec
+from ASTWriter import writeAST, renderAST
 from StaticError import *
+import io
 import json
+import timeit
 
 
 class TestUtil:
@@ -35,13 +45,24 @@ class TestLexer:
         lexer = BKITLexer(inputfile)
         try:
             TestLexer.printLexeme(dest,lexer)
-        except (ErrorToken,UncloseString,IllegalEscape) as err:
+        except (ErrorToken,UncloseString,IllegalEscape,UnterminatedComment) as err:
             dest.write(err.message)
         finally:
             dest.close() 
         dest = open("./test/solutions/" + str(num) + ".txt","r")
         line = dest.read()
-        return line == expect
+        # BKITScanner must give the same tokens
+        return line == expect and TestLexer.scan(inputfile) == line
+
+    @staticmethod
+    def scan(inputfile):
+        dest = io.StringIO()
+        inputfile.seek(0)
+        try:
+            TestLexer.printLexeme(dest,BKITScanner(inputfile))
+        except (ErrorToken,UncloseString,IllegalEscape,UnterminatedComment) as err:
+            dest.write(err.message)
+        return dest.getvalue()
 
     @staticmethod    
     def printLexeme(dest,lexer):
@@ -62,6 +83,8 @@ class SyntaxException(Exception):
         self.message = msg
 
 class TestParser:
+    # SLL first, then LL for the inputs with a syntax error
+    twoStage = TwoStageParser(NewErrorListener.INSTANCE)
     @staticmethod
     def createErrorListener():
          return NewErrorListener.INSTANCE
@@ -70,16 +93,8 @@ class TestParser:
     def checkParser(input,expect,num):
         inputfile = TestUtil.makeSource(input,num)
         dest = open("./test/solutions/" + str(num) + ".txt","w")
-        lexer = BKITLexer(inputfile)
-        listener = TestParser.createErrorListener()
-
-        tokens = CommonTokenStream(lexer)
-
-        parser = BKITParser(tokens)
-        parser.removeErrorListeners()
-        parser.addErrorListener(listener)
         try:
-            parser.program()
+            TestParser.twoStage.parse(inputfile)
             dest.write("successful")
         except SyntaxException as f:
             dest.write(f.message)
@@ -89,40 +104,60 @@ class TestParser:
             dest.close()
         dest = open("./test/solutions/" + str(num) + ".txt","r")
         line = dest.read()
-        return line == expect
+        # ASTParser must report the same
+        return line == expect and TestParser.parse(inputfile) == line
+
+    @staticmethod
+    def parse(inputfile):
+        inputfile.seek(0)
+        try:
+            ASTParser(BKITScanner(inputfile)).program()
+            return "successful"
+        except ParseError as f:
+            return f.message
+        except Exception as e:
+            return str(e)
 
 class TestAST:
+    twoStage = TwoStageParser()
     @staticmethod
     def checkASTGen(input,expect,num):
         inputfile = TestUtil.makeSource(input,num)
         dest = open("./test/solutions/" + str(num) + ".txt","w")
-        lexer = BKITLexer(inputfile)
-        tokens = CommonTokenStream(lexer)
-        parser = BKITParser(tokens)
-        tree = parser.program()
+        tree = TestAST.twoStage.parse(inputfile)
         asttree = ASTGeneration().visit(tree)
         dest.write(str(asttree))
         dest.close()
         dest = open("./test/solutions/" + str(num) + ".txt","r")
         line = dest.read()
-        return line == expect
+        # writeAST must print the same, and ASTParser build the same AST
+        written = io.StringIO()
+        writeAST(asttree, written)
+        inputfile.seek(0)
+        return line == expect and written.getvalue() == line and \
+            renderAST(ASTParser(BKITScanner(inputfile)).program()) == line
+    @staticmethod
+    def makeAST(input,names=None):
+        lexer = BKITLexer(InputStream(input))
+        lexer.names = names
+        parser = BKITParser(CommonTokenStream(lexer))
+        return ASTGeneration(names).visit(parser.program())
     @staticmethod
     def test(inputdir,outputdir,num):
         #print("inutdir = "+inputdir)
         #print("outputdir = "+outputdir)
         dest = open(outputdir + "/" + str(num) + ".txt","w")
-        lexer = BKITLexer(FileStream(inputdir + "/" + str(num) + ".txt"))
-        tokens = CommonTokenStream(lexer)
-        parser = BKITParser(tokens)
-        tree = parser.program()
+        tree = TestAST.twoStage.parse(FileStream(inputdir + "/" + str(num) + ".txt"))
         asttree = ASTGeneration().visit(tree)
         dest.write(str(asttree))
         dest.close()
-        dest1 = open(outputdir + "/" + str(num) + ".json","w")
-        dest1.write(asttree.to_json())
+        dest1 = open(outputdir + "/" + str(num) + ".ast","wb")
+        ASTCodec.dump(asttree, dest1)
         dest1.close()
 
 class TestChecker:
+    # ASTs of the sources are cached in $BKIT_AST_CACHE when it is set
+    astCache = ASTCache(os.environ["BKIT_AST_CACHE"]) if "BKIT_AST_CACHE" in os.environ else None
     @staticmethod
     def test(input,expect,num):
         return TestChecker.checkStatic(input,expect,num)
@@ -130,7 +165,10 @@ class TestChecker:
     def checkStatic(input,expect,num):
         dest = open("./test/solutions/" + str(num) + ".txt","w")
         
-        if type(input) is str:
+        if type(input) is str and TestChecker.astCache is not None:
+            inputfile = TestUtil.makeSource(input,num)
+            asttree = TestChecker.astCache.load(input)
+        elif type(input) is str:
             inputfile = TestUtil.makeSource(input,num)
             lexer = BKITLexer(inputfile)
             tokens = CommonTokenStream(lexer)
@@ -152,20 +190,59 @@ class TestChecker:
             dest.close()
         dest = open("./test/solutions/" + str(num) + ".txt","r")
         line = dest.read()
+        if type(input) is str:
+            # declarations parsed and checked one at a time give the same
+            return line == expect and TestChecker.streamed(inputfile) == line
         return line == expect
 
     @staticmethod
-    def test1(inputdir,outputdir,num):
-        
-        dest = open(outputdir + "/" + str(num) + ".txt","w")
-        
+    def streamed(inputfile):
         try:
-            lexer = BKITLexer(FileStream(inputdir + "/" + str(num) + ".txt"))
+            StreamingChecker(DeclarationStream(inputfile)).check()
+            return ""
+        except StaticError as e:
+            return str(e)
+        except ParseError as e:
+            return e.message
+
+    @staticmethod
+    def testAll(input,expect,num,maxErrors=None):
+        # expect: every error reported, one per line
+        dest = open("./test/solutions/" + str(num) + ".txt","w")
+        inputfile = TestUtil.makeSource(input,num)
+        if TestChecker.astCache is not None:
+            asttree = TestChecker.astCache.load(input)
+        else:
+            lexer = BKITLexer(inputfile)
             tokens = CommonTokenStream(lexer)
             parser = BKITParser(tokens)
             tree = parser.program()
             asttree = ASTGeneration().visit(tree)
 
+        checker = StaticChecker(asttree)
+        try:
+            dest.write("\n".join(str(e) for e in checker.checkAll(maxErrors)))
+        finally:
+            dest.close()
+        dest = open("./test/solutions/" + str(num) + ".txt","r")
+        line = dest.read()
+        return line == expect
+
+    @staticmethod
+    def test1(inputdir,outputdir,num):
+        
+        dest = open(outputdir + "/" + str(num) + ".txt","w")
+        
+        try:
+            if TestChecker.astCache is not None:
+                asttree = TestChecker.astCache.loadFile(inputdir + "/" + str(num) + ".txt")
+            else:
+                lexer = BKITLexer(FileStream(inputdir + "/" + str(num) + ".txt"))
+                tokens = CommonTokenStream(lexer)
+                parser = BKITParser(tokens)
+                tree = parser.program()
+                asttree = ASTGeneration().visit(tree)
+
             checker = StaticChecker(asttree)
             res = checker.check()
             
@@ -178,3 +255,32 @@ class TestChecker:
             dest.close()
 
         
+
+
+class TestBench:
+    @staticmethod
+    def checkPrograms():
+        # ASTs of the CheckSuite programs, run the CheckSuite to write them
+        asttrees = []
+        for num in range(400, 600):
+            filename = "./test/testcases/" + str(num) + ".txt"
+            if not os.path.isfile(filename):
+                continue
+            with open(filename) as file:
+                if file.read().startswith("Program("):
+                    continue
+            lexer = BKITLexer(FileStream(filename))
+            tokens = CommonTokenStream(lexer)
+            parser = BKITParser(tokens)
+            asttrees.append(ASTGeneration().visit(parser.program()))
+        return asttrees
+
+    @staticmethod
+    def parseTree(source):
+        lexer = BKITLexer(InputStream(source))
+        return BKITParser(CommonTokenStream(lexer)).program()
+
+    @staticmethod
+    def best(function, repeat=5):
+        # best time of function() in milliseconds
+        return min(timeit.timeit(function, number=1) for _ in range(repeat)) * 1000
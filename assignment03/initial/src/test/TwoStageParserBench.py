@@ -0,0 +1,53 @@
+"""
+ Time TwoStageParser takes against BKITParser in LL mode, the way
+ TestParser parsed before, on the ParserSuite inputs and on the CheckSuite
+ programs. Run the two suites first to write the inputs.
+"""
+from antlr4 import CommonTokenStream, InputStream
+from BKITLexer import BKITLexer
+from BKITParser import BKITParser
+from TwoStageParser import TwoStageParser
+from ASTCodecBench import checkSources
+from TestUtils import TestBench, NewErrorListener, SyntaxException
+from lexererr import *
+
+
+def parserSources():
+    sources = []
+    for num in range(200, 300):
+        try:
+            with open("./test/testcases/%d.txt" % num) as file:
+                sources.append(file.read())
+        except OSError:
+            continue
+    return sources
+
+
+def llParse(input):
+    parser = BKITParser(CommonTokenStream(BKITLexer(input)))
+    parser.removeErrorListeners()
+    parser.addErrorListener(NewErrorListener.INSTANCE)
+    return parser.program()
+
+
+def parseAll(parse, sources):
+    for source in sources:
+        try:
+            parse(InputStream(source))
+        except (SyntaxException, ErrorToken, UncloseString, IllegalEscape, UnterminatedComment):
+            pass
+
+
+def compare(label, sources, repeat):
+    twoStage = TwoStageParser(NewErrorListener.INSTANCE)
+    parseAll(twoStage.parse, sources)
+    fallbacks = twoStage.fallbacks
+    ll = TestBench.best(lambda: parseAll(llParse, sources), repeat)
+    sll = TestBench.best(lambda: parseAll(twoStage.parse, sources), repeat)
+    print("%s: LL %.1f ms, SLL first %.1f ms (%.1fx faster), %d parsed again with LL"
+          % (label, ll, sll, ll / sll, fallbacks))
+
+
+def bench():
+    compare("%d ParserSuite inputs" % len(parserSources()), parserSources(), 20)
+    compare("%d CheckSuite programs" % len(checkSources()), checkSources(), 5)
@@ -0,0 +1,85 @@
+"""
+ Visiting through the dispatch table of Visitor against the accept()
+ double dispatch it replaced, on the CheckSuite programs: checking them,
+ and only walking them to collect their names.
+"""
+from types import GeneratorType
+from TestUtils import TestBench
+from StaticCheck import StaticChecker
+from IncrementalCheck import NameCollector
+from StaticError import StaticError
+
+
+def visitByAccept(self, ast, param):
+    # Visitor.visit as it was before the dispatch table
+    result = ast.accept(self, param)
+    if type(result) is not GeneratorType:
+        return result
+    stack = [result]
+    result = error = None
+    while stack:
+        try:
+            if error is None:
+                child, childParam = stack[-1].send(result)
+            else:
+                thrown, error = error, None
+                child, childParam = stack[-1].throw(thrown)
+        except StopIteration as stop:
+            stack.pop()
+            result = stop.value
+            continue
+        except Exception as e:
+            stack.pop()
+            error = e
+            continue
+        try:
+            result = child.accept(self, childParam)
+        except Exception as e:
+            error = e
+            continue
+        if type(result) is GeneratorType:
+            stack.append(result)
+            result = None
+    if error is not None:
+        raise error
+    return result
+
+
+class AcceptChecker(StaticChecker):
+    visit = visitByAccept
+
+
+class AcceptCollector(NameCollector):
+    visit = visitByAccept
+
+
+def checkAll(checkerClass, asttrees):
+    for asttree in asttrees:
+        try:
+            checkerClass(asttree).check()
+        except StaticError:
+            pass
+
+
+def collectAll(collectorClass, asttrees):
+    for asttree in asttrees:
+        collector = collectorClass()
+        for decl in asttree.decl:
+            collector.visit(decl, set())
+
+
+def compare(title, accept, table):
+    print(title)
+    print("    accept():       %8.2f ms" % accept)
+    print("    dispatch table: %8.2f ms (%.2fx)" % (table, accept / table))
+
+
+def bench():
+    asttrees = TestBench.checkPrograms()
+    print("%d programs" % len(asttrees))
+    compare("StaticChecker",
+            TestBench.best(lambda: checkAll(AcceptChecker, asttrees), 20),
+            TestBench.best(lambda: checkAll(StaticChecker, asttrees), 20))
+    compare("NameCollector x 10",
+            TestBench.best(lambda: [collectAll(AcceptCollector, asttrees) for _ in range(10)], 20),
+            TestBench.best(lambda: [collectAll(NameCollector, asttrees) for _ in range(10)], 20))